@@ -4,14 +4,33 @@ import sys
 import os
 import logging
 import signal
+import select
 import ctypes
 import threading
+import asyncio
+import concurrent.futures
+import argparse
+import array
+import bisect
+import mmap
+import struct
+import http.server
+import collections
+import itertools
+import random
+import tracemalloc
+import json
+import gzip
+import zlib
+import re
+import math
 
 # --- Konfigurations-Management ---
-def load_or_create_config():
+def load_or_create_config(create=True):
     import json
     """
     Lädt die Konfiguration aus 'config.json' oder erstellt sie.
+    Mit create=False (Abfragen wie 'history' oder 'bench') wird keine Datei angelegt.
     Gibt das Konfigurations-Dictionary zurück.
     """
     config_path = 'config.json'
@@ -20,13 +39,71 @@ def load_or_create_config():
         'RAM_LIMIT_MB': 4096,
         'PROCESS_NAME': "brave",
         'CHECK_INTERVAL_SECONDS': 60,
-        'RESTART_WAIT_SECONDS': 30,
+        'RESTART_WAIT_SECONDS': 30, # Feste Wartezeit nach einem Neustart (nur ohne LAUNCH_SCHEDULER_ENABLED)
+        'LAUNCH_SCHEDULER_ENABLED': True, # Profile gestaffelt starten und weiter überwachen, sobald alle bereit sind
+        'LAUNCH_CONCURRENCY': 2, # So viele Profile starten gleichzeitig
+        'LAUNCH_READY_STABLE_SECONDS': 3, # Gestartete Profile gelten als bereit, wenn sich die Prozesse der Instanz so lange nicht mehr ändern...
+        'LAUNCH_READY_TOLERANCE_MB': 25, # ...und ihr RSS dabei um höchstens so viel schwankt
+        'LAUNCH_READY_TIMEOUT_SECONDS': 60, # Spätestens nach dieser Zeit wird mit dem nächsten Profil fortgefahren
+        'LAUNCH_POLL_SECONDS': 0.5, # Abstand der Prüfungen während des Starts
         'WM_CLOSE_WAIT_SECONDS': 10, # Extra Zeit für die sauberste Methode (WM_CLOSE)
         'GRACEFUL_SHUTDOWN_WAIT_SECONDS': 5, # Kürzere Zeit für die Taskkill-Methoden
+        'ADAPTIVE_INTERVAL_ENABLED': True, # Prüfintervall je nach Trend zwischen MIN_ und MAX_CHECK_INTERVAL_SECONDS anpassen
+        'MIN_CHECK_INTERVAL_SECONDS': 1, # Kürzestes Intervall, wenn eine Überschreitung naht
+        'MAX_CHECK_INTERVAL_SECONDS': 120, # Längstes Intervall bei stabilem Verbrauch
+        'TREND_SMOOTHING': 0.3, # Glättungsfaktor (EWMA) für die Steigung des RAM-Verbrauchs
+        'TREND_FLAT_MB_PER_MINUTE': 10, # Unterhalb dieser Steigung gilt der Verbrauch als stabil
+        'PREDICTIVE_RESTART_ENABLED': True, # Schon vor der Überschreitung handeln, wenn sie unmittelbar bevorsteht
+        'PREDICTIVE_MIN_PERCENT': 90, # ...aber nur, wenn bereits dieser Anteil des Limits erreicht ist
+        'PREDICTIVE_HORIZON_SECONDS': 10, # ...und die Überschreitung in höchstens so vielen Sekunden erwartet wird
+        'TARGETED_RECLAIM_ENABLED': True, # Vor einem Komplett-Neustart zuerst die größten Renderer/Utility-Prozesse beenden
+        'TARGETED_RECLAIM_TYPES': ['renderer', 'utility'], # Prozesstypen (--type=...), die gezielt beendet werden dürfen
+        'TARGETED_RECLAIM_MAX_PROCESSES': 3, # Maximal so viele Prozesse pro Überschreitung gezielt beenden
+        'TARGETED_RECLAIM_WAIT_SECONDS': 2, # Wartezeit auf das Ende der gezielt beendeten Prozesse
+        'CGROUP_ENABLED': False, # Nur Linux: Brave in einer eigenen cgroup v2 starten und über memory.current überwachen
+        'CGROUP_PATH': '', # Pfad der cgroup; leer = 'brave-ram-monitor.scope' neben der eigenen cgroup
+        'CGROUP_MEMORY_HIGH_PERCENT': 90, # memory.high in Prozent von RAM_LIMIT_MB (Kernel fordert ab hier Speicher zurück)
+        'PSI_TRIGGER_ENABLED': False, # Nur Linux: bei gemeldetem Speicherdruck (PSI) sofort prüfen und Speicher freigeben
+        'PSI_SOURCE': 'system', # 'system' (/proc/pressure/memory) oder 'cgroup' (memory.pressure der Brave-cgroup)
+        'PSI_STALL_TYPE': 'some', # 'some' oder 'full'
+        'PSI_STALL_THRESHOLD_MS': 150, # Stall-Zeit pro Zeitfenster, ab der der Trigger auslöst
+        'PSI_WINDOW_SECONDS': 2, # Zeitfenster des Triggers (ohne Root nur Vielfache von 2s)
+        'PSI_RECLAIM_MIN_MB': 1024, # Bei Speicherdruck nur eingreifen, wenn Brave mindestens so viel RAM belegt
+        'PSI_COOLDOWN_SECONDS': 300, # Mindestabstand zwischen zwei durch Speicherdruck ausgelösten Freigaben
+        'MEMORY_ACCOUNTING': 'rss', # 'rss', 'pss' oder 'uss' (geteilter Speicher wird bei PSS/USS nicht mehrfach gezählt)
+        'PSS_EVERY_N_TICKS': 10, # PSS/USS nur jede N-te Prüfung exakt messen, dazwischen hochrechnen
+        'PSS_RSS_THRESHOLD_PERCENT': 80, # Oberhalb dieses RSS-Anteils am Limit wird PSS/USS immer exakt gemessen
+        'MEMORY_SAMPLER': 'auto', # 'auto', 'proc' (nur Linux, liest /proc direkt) oder 'psutil'
+        'PROCESS_RESCAN_TICKS': 60, # Innerhalb so vieler Prüfungen wird bei jeder verworfenen PID einmal die Startzeit geprüft (erkennt wiederverwendete PIDs)
+        'HISTORY_ENABLED': False, # Jede Messung in einem kompakten binären Ringpuffer speichern (Auswertung: 'history')
+        'HISTORY_PATH': 'brave_ram_history.bin', # Pfad der Verlaufsdatei
+        'HISTORY_CAPACITY': 604800, # Anzahl Datensätze (26 Bytes pro Messung; 604800 = 7 Tage bei 1s, ca. 15 MB)
+        'TRACE_ENABLED': False, # Jede Messung mit allen Prozessen aufzeichnen (Auswertung offline: 'replay')
+        'TRACE_PATH': 'brave_ram_trace.tsv.gz', # Vorlage für die Trace-Dateien, je Lauf mit Startzeit im Namen (Endung .gz = komprimiert)
+        'METRICS_ENABLED': False, # Prometheus/OpenMetrics-Endpunkt unter /metrics bereitstellen
+        'METRICS_BIND': '127.0.0.1', # Adresse des Endpunkts ('0.0.0.0' für Zugriff von außen)
+        'METRICS_PORT': 9464, # Port des Endpunkts
+        'DAEMON_MODE': 'async', # 'async' (Messung läuft während eines Neustarts weiter) oder 'loop' (klassische Schleife)
+        'ASYNC_WORKER_THREADS': 4, # Threads für blockierende psutil-/subprocess-Aufrufe im asynchronen Daemon
+        'EXPORTER_QUEUE_SIZE': 100, # Puffer für Messungen, die noch nicht exportiert wurden
+        'MULTI_INSTANCE_ENABLED': False, # Systemweit: Brave-Instanzen aller Benutzer in einem Durchlauf erfassen und einzeln begrenzen
+        'INSTANCE_SCOPE': 'instance', # 'instance' (Benutzer + user-data-dir) oder 'user' (alle Instanzen eines Benutzers zusammen)
+        'INSTANCE_RAM_LIMITS_MB': {}, # Eigene Limits je Benutzername oder user-data-dir, z.B. {"alice": 2048}; sonst gilt RAM_LIMIT_MB
+        'LEAK_DETECTION_ENABLED': False, # Wachstum (MB/min) jedes Brave-Prozesses verfolgen und die am schnellsten wachsenden melden
+        'LEAK_WINDOW_SECONDS': 600, # Zeitfenster der gleitenden Regression (ältere Messungen verlieren exponentiell an Gewicht)
+        'LEAK_MIN_AGE_SECONDS': 300, # Ein Prozess wird erst nach so langer Beobachtung bewertet
+        'LEAK_REPORT_MB_PER_MINUTE': 2, # Ab diesem Wachstum gilt ein Prozess als verdächtig
+        'LEAK_TOP_K': 5, # Anzahl der gemeldeten Prozesse
+        'LEAK_REPORT_INTERVAL_SECONDS': 300, # Höchstens so oft wird gemeldet
+        'LEAK_RECLAIM_PRIORITY': False, # Beim gezielten Beenden verdächtige Prozesse (schnellstes Wachstum) vor den größten wählen
+        'SHUTDOWN_STRATEGY': 'graceful', # 'graceful' (mehrstufig), 'terminate' (terminate, dann kill), 'kill' (sofort) oder 'none' (nur warnen)
+        'TARGETS': [], # Mehrere Anwendungen überwachen, z.B. [{"NAME": "chrome", "PROCESS_NAME": "chrome", "RAM_LIMIT_MB": 3072}]; leer = nur Brave
         'LOG_LEVEL': 'INFO'
     }
 
     if not os.path.exists(config_path):
+        if not create:
+            return default_config
         logging.info(f"Konfigurationsdatei '{config_path}' nicht gefunden. Erstelle sie mit Standardwerten.")
         try:
             with open(config_path, 'w', encoding='utf-8') as f:
@@ -140,15 +217,28 @@ def find_brave_executable_path():
             return path
     return ""
 
-def find_active_brave_profiles(brave_processes):
+def get_cmdline_switch(cmdline, switch):
+    """Gibt den Wert eines Schalters wie '--profile-directory=...' aus der Kommandozeile zurück (oder None)."""
+    prefix = switch + '='
+    for arg in cmdline:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return None
+
+def find_active_brave_profiles(entries):
     """
-    Identifiziert aktive Brave-Profile durch die Analyse der von den Prozessen geöffneten Dateien.
-    Diese Methode ist zuverlässiger als das Parsen von Kommandozeilenargumenten.
+    Identifiziert aktive Brave-Profile.
+    Auf allen Systemen wird '--profile-directory' aus der zwischengespeicherten Kommandozeile der
+    Hauptprozesse gelesen. Unter Windows werden zusätzlich die von den Prozessen geöffneten Dateien
+    analysiert, da dort mehrere Profile in einem Hauptprozess ohne entsprechenden Schalter laufen.
     """
     active_profiles = set()
+    for entry in entries:
+        if entry.proc_type == 'browser':
+            profile_name = get_cmdline_switch(entry.cmdline, '--profile-directory')
+            if profile_name:
+                active_profiles.add(profile_name)
     if not IS_WINDOWS:
-        # Auf Nicht-Windows-Systemen ist das Parsen der Kommandozeile oft zuverlässiger.
-        # Diese Implementierung kann bei Bedarf hinzugefügt werden.
         return list(active_profiles)
 
     local_app_data = os.environ.get("LOCALAPPDATA")
@@ -162,9 +252,9 @@ def find_active_brave_profiles(brave_processes):
     # Wir normalisieren den Pfad für zuverlässige Vergleiche
     user_data_path_norm = os.path.normpath(user_data_path)
 
-    for proc in brave_processes:
+    for entry in entries:
         try:
-            open_files = proc.open_files()
+            open_files = entry.proc.open_files()
             for file in open_files:
                 file_path_norm = os.path.normpath(file.path)
                 # Prüfen, ob die geöffnete Datei im "User Data"-Verzeichnis liegt
@@ -183,43 +273,963 @@ def find_active_brave_profiles(brave_processes):
     
     return list(active_profiles)
 
-def get_brave_processes_and_memory_and_profiles(config):
-    """Ermittelt alle Brave-Prozesse, deren RAM-Verbrauch und die aktiven Profile."""
-    brave_processes = []
-    total_ram_bytes = 0
-    # Hole die PID des aktuellen Skripts, um es selbst zu ignorieren.
-    # Das ist entscheidend, wenn das Skript zu einer .exe mit "brave" im Namen kompiliert wird.
-    self_pid = os.getpid()
 
-    for proc in psutil.process_iter(['name', 'memory_info', 'cmdline']):
+class TrackedProcess:
+    """Zwischengespeicherte Daten eines einmal klassifizierten Brave-Prozesses."""
+    __slots__ = ('proc', 'pid', 'create_time', 'name', 'cmdline', 'proc_type', 'rss', 'ppid', 'user', 'instance', 'target', 'growth')
+
+    def __init__(self, proc, name, cmdline, target=None):
+        self.proc = proc
+        self.pid = proc.pid
+        self.create_time = proc.create_time()
+        self.name = name
+        self.cmdline = cmdline
+        # '--type=renderer' -> 'renderer'; der Hauptprozess hat kein '--type'.
+        self.proc_type = next((arg.split('=', 1)[1] for arg in cmdline if arg.startswith('--type=')), 'browser')
+        self.rss = 0
+        self.ppid = proc.ppid()
+        self.user = None  # Nur im systemweiten Modus (MULTI_INSTANCE_ENABLED) ermittelt
+        self.instance = None  # (Benutzer, user-data-dir) des zugehörigen Hauptprozesses, sobald bekannt
+        self.target = target  # MonitorTarget, zu dem der Prozess gehört
+        self.growth = 0.0  # Wachstum in MB/min laut LeakDetector
+
+    @property
+    def key(self):
+        return (self.pid, self.create_time)
+
+
+class PsutilMemorySampler:
+    """Plattformunabhängiges Auslesen des RAM-Verbrauchs über psutil (Fallback)."""
+    name = 'psutil'
+
+    def sample(self, entry):
+        """Aktualisiert entry.rss. Gibt False zurück, wenn der Prozess nicht mehr existiert."""
         try:
-            name = proc.info.get('name', '')
-            # Sicherstellen, dass cmdline immer eine Liste ist, auch wenn psutil 'None' zurückgibt.
-            cmdline = proc.info.get('cmdline') or []
+            # is_running() vergleicht die create_time und erkennt so wiederverwendete PIDs.
+            if not entry.proc.is_running():
+                return False
+            entry.rss = entry.proc.memory_info().rss
+            # Zombies (beendet, aber noch nicht abgeholt) melden 0 Bytes; nur dann den Status nachlesen.
+            if not entry.rss and entry.proc.status() == psutil.STATUS_ZOMBIE:
+                return False
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return False
+        except psutil.AccessDenied:
+            entry.rss = 0
+        return True
+
+    def forget(self, pid):
+        pass
+
+    def close(self):
+        pass
+
+
+class ProcMemorySampler:
+    """
+    Schneller Linux-Pfad: liest /proc/<pid>/statm (RSS) und /proc/<pid>/stat (PPID) direkt.
+    Die Dateideskriptoren bleiben pro Prozess offen und werden per preadv in einen
+    wiederverwendeten Puffer gelesen. Ein offener Deskriptor bleibt an den ursprünglichen
+    Prozess gebunden; nach dessen Ende liefert er ESRCH, auch wenn die PID neu vergeben wurde.
+    Offen gehalten werden höchstens so viele Deskriptoren, wie FD_SHARE des Limits (RLIMIT_NOFILE)
+    erlaubt; weitere Prozesse werden bei jeder Messung geöffnet, gelesen und wieder geschlossen.
+    """
+    name = 'proc'
+    FD_SHARE = 0.25  # Anteil von RLIMIT_NOFILE, den der Cache höchstens belegt (zwei Deskriptoren pro Prozess)
+
+    def __init__(self):
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+        self._fds = {}  # pid -> (statm_fd, stat_fd)
+        self._buf = bytearray(1024)
+        try:
+            import resource
+            soft_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+            if soft_limit == resource.RLIM_INFINITY:
+                soft_limit = 65536
+        except (ImportError, OSError, ValueError):
+            soft_limit = 1024
+        self.max_cached = int(soft_limit * self.FD_SHARE) // 2
+        self._fd_warning_logged = False
+
+    @staticmethod
+    def is_supported():
+        return sys.platform.startswith('linux') and hasattr(os, 'preadv') and os.path.exists('/proc/self/statm')
+
+    @staticmethod
+    def _open_fds(pid):
+        statm_fd = os.open(f"/proc/{pid}/statm", os.O_RDONLY)
+        try:
+            stat_fd = os.open(f"/proc/{pid}/stat", os.O_RDONLY)
+        except OSError:
+            os.close(statm_fd)
+            raise
+        return (statm_fd, stat_fd)
+
+    def _open(self, entry):
+        fds = self._open_fds(entry.pid)
+        # Die Deskriptoren sind jetzt an den Prozess gebunden. Einmalig prüfen, dass es
+        # noch derselbe Prozess ist, den der Tracker klassifiziert hat.
+        if not entry.proc.is_running():
+            self._close_fds(fds)
+            raise ProcessLookupError(entry.pid)
+        self._fds[entry.pid] = fds
+        return fds
+
+    def _read(self, entry, fds):
+        """Liest RSS und PPID über die Deskriptoren. ProcessLookupError, wenn der Prozess beendet (oder ein Zombie) ist."""
+        buf = self._buf
+        # statm: "size resident shared text lib data dt" (in Seiten)
+        n = os.preadv(fds[0], [buf], 0)
+        if not n:
+            raise ProcessLookupError(entry.pid)
+        start = buf.index(b' ', 0, n) + 1
+        rss = int(buf[start:buf.index(b' ', start, n)]) * self._page_size
+        # stat: "pid (comm) state ppid ..." - comm kann Leerzeichen und Klammern enthalten.
+        n = os.preadv(fds[1], [buf], 0)
+        if not n:
+            raise ProcessLookupError(entry.pid)
+        start = buf.rindex(b')', 0, n) + 2
+        # Zombies (beendet, aber noch nicht abgeholt) belegen keinen Speicher mehr.
+        if buf[start] == ord('Z'):
+            raise ProcessLookupError(entry.pid)
+        start += 2
+        entry.ppid = int(buf[start:buf.index(b' ', start, n)])
+        entry.rss = rss
+
+    def _read_uncached(self, entry):
+        """Öffnen, lesen, schließen: für Prozesse, die nicht mehr in den Deskriptor-Cache passen."""
+        fds = self._open_fds(entry.pid)
+        try:
+            self._read(entry, fds)
+        finally:
+            self._close_fds(fds)
+        # Ohne gebundenen Deskriptor könnte die PID inzwischen einem anderen Prozess gehören.
+        if not entry.proc.is_running():
+            raise ProcessLookupError(entry.pid)
+
+    def _sample_psutil(self, entry, error):
+        """Ersatzweg, wenn /proc nicht gelesen werden kann (z.B. keine Deskriptoren frei: EMFILE/ENFILE)."""
+        if not self._fd_warning_logged:
+            self._fd_warning_logged = True
+            logging.warning(f"⚠️ /proc nicht lesbar ({error}). Verwende für betroffene Prozesse psutil bzw. den letzten Messwert.")
+        try:
+            entry.rss = entry.proc.memory_info().rss
+            entry.ppid = entry.proc.ppid()
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return False
+        except psutil.AccessDenied:
+            entry.rss = 0
+        except OSError:
+            pass  # Auch psutil bekommt keinen Deskriptor; den letzten Messwert behalten statt den Prozess zu verlieren.
+        return True
+
+    def sample(self, entry):
+        """Aktualisiert entry.rss und entry.ppid. Gibt False zurück, wenn der Prozess nicht mehr existiert."""
+        try:
+            fds = self._fds.get(entry.pid)
+            if fds is None and len(self._fds) >= self.max_cached:
+                self._read_uncached(entry)
+            else:
+                self._read(entry, fds or self._open(entry))
+        except PermissionError:
+            entry.rss = 0
+        except (ProcessLookupError, FileNotFoundError, psutil.NoSuchProcess, psutil.ZombieProcess):
+            # Nur ESRCH/ENOENT bedeuten "beendet"; andere Fehler dürfen den Prozess nicht aus der Summe fallen lassen.
+            self.forget(entry.pid)
+            return False
+        except (OSError, ValueError, psutil.Error) as e:
+            self.forget(entry.pid)
+            return self._sample_psutil(entry, e)
+        return True
+
+    @staticmethod
+    def _close_fds(fds):
+        for fd in fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def forget(self, pid):
+        fds = self._fds.pop(pid, None)
+        if fds:
+            self._close_fds(fds)
+
+    def close(self):
+        for pid in list(self._fds):
+            self.forget(pid)
+
+
+def create_memory_sampler(config):
+    """Wählt das Backend zum Auslesen des RAM-Verbrauchs gemäß 'MEMORY_SAMPLER' ('auto', 'proc' oder 'psutil')."""
+    choice = str(config.get('MEMORY_SAMPLER', 'auto')).lower()
+    if choice in ('auto', 'proc') and ProcMemorySampler.is_supported():
+        return ProcMemorySampler()
+    if choice == 'proc':
+        logging.warning("MEMORY_SAMPLER 'proc' wird auf diesem System nicht unterstützt. Verwende psutil.")
+    return PsutilMemorySampler()
+
+
+_HAS_SMAPS_ROLLUP = os.path.exists('/proc/self/smaps_rollup')
+
+def read_smaps_rollup(pid):
+    """Liest PSS und USS (in Bytes) aus /proc/<pid>/smaps_rollup. Nur Linux (ab Kernel 4.14)."""
+    pss = uss = 0
+    with open(f"/proc/{pid}/smaps_rollup", 'rb') as f:
+        for line in f:
+            if line.startswith(b'Pss:'):
+                pss = int(line.split()[1]) * 1024
+            elif line.startswith(b'Private_Clean:') or line.startswith(b'Private_Dirty:'):
+                uss += int(line.split()[1]) * 1024
+    return pss, uss
+
+
+class MemoryAccountant:
+    """
+    Rechnet den RAM-Verbrauch gemäß 'MEMORY_ACCOUNTING' ab ('rss', 'pss' oder 'uss').
+    PSS/USS sind deutlich teurer als RSS. Sie werden daher nur jeden N-ten Tick oder oberhalb
+    einer RSS-Schwelle exakt gemessen. Dazwischen wird die RSS-Summe mit dem zuletzt gemessenen
+    Verhältnis hochgerechnet.
+    """
+
+    def __init__(self, config):
+        requested = str(config.get('MEMORY_ACCOUNTING', 'rss')).lower()
+        self.mode = self.resolve_mode(config)
+        self.use_smaps = _HAS_SMAPS_ROLLUP
+        if requested not in ('rss', 'pss', 'uss'):
+            logging.warning(f"Unbekannter MEMORY_ACCOUNTING-Wert '{requested}'. Verwende 'rss'.")
+        elif requested != self.mode:
+            # Außerhalb von Linux liefert psutil kein PSS, USS ist die nächstbeste Größe.
+            logging.warning("PSS wird auf diesem System nicht unterstützt. Verwende 'uss'.")
+        self.every_n_ticks = max(1, int(config.get('PSS_EVERY_N_TICKS', 10)))
+        self.threshold_bytes = config['RAM_LIMIT_MB'] * 1024 * 1024 * config.get('PSS_RSS_THRESHOLD_PERCENT', 80) / 100
+        self._ticks = 0
+        self._ratio = None  # Zuletzt gemessenes Verhältnis PSS/USS zu RSS
+
+    @staticmethod
+    def resolve_mode(config):
+        """Gibt den tatsächlich verwendeten Modus zurück (PSS wird ohne smaps_rollup zu USS)."""
+        mode = str(config.get('MEMORY_ACCOUNTING', 'rss')).lower()
+        if mode not in ('rss', 'pss', 'uss'):
+            return 'rss'
+        if mode == 'pss' and not _HAS_SMAPS_ROLLUP:
+            return 'uss'
+        return mode
+
+    def _read_process(self, entry):
+        """Gibt PSS bzw. USS eines Prozesses in Bytes zurück (RSS, falls nicht lesbar, z.B. fremde Prozesse ohne Rechte)."""
+        try:
+            if self.use_smaps:
+                pss, uss = read_smaps_rollup(entry.pid)
+                return pss if self.mode == 'pss' else uss
+            return entry.proc.memory_full_info().uss
+        except (OSError, ValueError, psutil.Error):
+            return entry.rss
+
+    def total_bytes(self, entries):
+        """Gibt den abgerechneten Gesamtverbrauch der übergebenen Prozesse in Bytes zurück."""
+        rss_total = sum(entry.rss for entry in entries)
+        if self.mode == 'rss' or not rss_total:
+            return rss_total
+
+        self._ticks += 1
+        if self._ratio is None or self._ticks % self.every_n_ticks == 0 or rss_total >= self.threshold_bytes:
+            accounted = sum(self._read_process(entry) for entry in entries)
+            if accounted <= 0:
+                # Nichts verwertbar gelesen: RSS melden und beim nächsten Tick erneut exakt messen.
+                self._ratio = None
+                return rss_total
+            self._ratio = accounted / rss_total
+            return accounted
+        return rss_total * self._ratio
+
+
+# Hilfsprozesse ohne '--type=' (Crash-Reporter wie chrome_crashpad_handler, brave_crashpad_handler.exe),
+# die sonst wegen ihres Namens als Browser-Hauptprozess gelten würden.
+_HELPER_PROCESS_PATTERN = re.compile(r'crashhandler|crashpad|_handler\b')
+
+class MonitorTarget:
+    """
+    Eine überwachte Anwendung aus TARGETS (ohne TARGETS: Brave mit den globalen Einstellungen).
+    config enthält die globalen Einstellungen, überschrieben von den Schlüsseln der Regel.
+    """
+
+    def __init__(self, config, default=False):
+        self.config = config
+        self.default = default
+        self.process_name = str(config['PROCESS_NAME']).lower()
+        self.name = config.get('NAME') or self.process_name
+        pattern = config.get('MAIN_EXECUTABLE_PATTERN')
+        self.main_pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+
+    def is_main_executable(self, executable):
+        """Prüft, ob argv[0] auf die Anwendung selbst zeigt."""
+        if self.main_pattern:
+            return self.main_pattern.search(executable) is not None
+        return self.process_name in os.path.basename(executable).lower()
+
+def build_targets(config):
+    """Erstellt die MonitorTarget-Liste aus TARGETS bzw. aus den globalen Einstellungen."""
+    rules = config.get('TARGETS') or []
+    if not rules:
+        # Linux: /opt/brave.com/brave/brave, macOS: .../Brave Browser.app/Contents/MacOS/Brave Browser.
+        # Unter Windows über den Installationspfad, damit eine kompilierte brave_ram_monitor.exe nicht passt.
+        legacy = {'MAIN_EXECUTABLE_PATTERN': re.escape('Brave-Browser')} if IS_WINDOWS and not config.get('MAIN_EXECUTABLE_PATTERN') else {}
+        return [MonitorTarget({**config, **legacy}, default=True)]
+    targets = []
+    for rule in rules:
+        if not rule.get('PROCESS_NAME') and not rule.get('NAME'):
+            logging.error(f"❌ Regel in TARGETS ohne PROCESS_NAME/NAME wird ignoriert: {rule}")
+            continue
+        rule = {'PROCESS_NAME': rule.get('NAME'), **rule}
+        try:
+            target = MonitorTarget({**config, **rule})
+        except re.error as e:
+            logging.error(f"❌ Ungültiges MAIN_EXECUTABLE_PATTERN in Regel '{rule.get('NAME')}': {e}. Regel wird ignoriert.")
+            continue
+        if any(t.name == target.name for t in targets):
+            logging.error(f"❌ Doppelter Name '{target.name}' in TARGETS. Regel wird ignoriert.")
+            continue
+        targets.append(target)
+    return targets
+
+
+class PsutilProcessSource:
+    """Prozessquelle für das echte System (über psutil)."""
+
+    def pids(self):
+        return psutil.pids()
+
+    def process(self, pid):
+        return psutil.Process(pid)
 
-            # Zuverlässigere Identifizierung von echten Brave-Prozessen.
-            # Ein kompilertes Skript (brave_ram_monitor.exe) hat keine "--type" Argumente.
-            is_real_brave_process = any(arg.startswith('--type=') for arg in cmdline)
+    def create_sampler(self, config):
+        return create_memory_sampler(config)
 
-            # Der Haupt-Browser-Prozess hat oft kein '--type', aber auch keine anderen verdächtigen Argumente.
-            # Wir fügen ihn hinzu, wenn er nicht bereits als "real" identifiziert wurde.
-            is_main_brave_process = (not is_real_brave_process and cmdline and "Brave-Browser" in cmdline[0])
 
-            is_target_process = is_real_brave_process or is_main_brave_process
+class BraveProcessTracker:
+    """
+    Verfolgt Brave-Prozesse über mehrere Ticks hinweg, geschlüsselt nach (pid, create_time).
+    Jeder Prozess wird nur einmal klassifiziert. Pro Tick werden nur neu aufgetauchte PIDs untersucht
+    und anschließend nur die bekannten Brave-Prozesse nach ihrem RAM-Verbrauch gefragt.
+    Wiederverwendete PIDs erkennt bei verfolgten Prozessen der Sampler; bei verworfenen Prozessen wird
+    reihum die Startzeit geprüft, verteilt auf PROCESS_RESCAN_TICKS Ticks.
+    """
 
-            if name and config['PROCESS_NAME'] in name.lower() and 'crashhandler' not in name.lower() and proc.pid != self_pid and is_target_process:
-                brave_processes.append(proc)
-                mem_info = proc.info.get('memory_info')
-                if mem_info and hasattr(mem_info, 'rss'):
-                    total_ram_bytes += mem_info.rss
+    def __init__(self, config, source=None):
+        self.targets = build_targets(config)
+        # Alle Prozessnamen in einem vorkompilierten Ausdruck: ein Aufruf pro neuer PID, unabhängig von der
+        # Anzahl der Ziele. Die benannte Gruppe des Treffers verweist auf das Ziel (t0, t1, ...). Längere Namen
+        # stehen vorne, damit bei gleicher Fundstelle die genauere Regel gewinnt ('msedgewebview2' vor 'msedge').
+        by_length = sorted(enumerate(self.targets), key=lambda item: len(item[1].process_name), reverse=True)
+        self._name_matcher = re.compile('|'.join(f'(?P<t{index}>{re.escape(target.process_name)})' for index, target in by_length) or '(?!)')
+        # Woher PIDs und Prozessobjekte stammen; für Benchmarks und Simulationen austauschbar.
+        self.source = source or PsutilProcessSource()
+        # Innerhalb so vieler Ticks wird jeder verworfene Prozess einmal auf eine neue Startzeit geprüft,
+        # damit wiederverwendete PIDs (unter Windows häufig) nicht dauerhaft falsch als "kein Brave" gelten.
+        self.rescan_ticks = max(1, int(config.get('PROCESS_RESCAN_TICKS', 60)))
+        # Hole die PID des aktuellen Skripts, um es selbst zu ignorieren.
+        # Das ist entscheidend, wenn das Skript zu einer .exe mit "brave" im Namen kompiliert wird.
+        self._self_pid = os.getpid()
+        # Im systemweiten Modus wird der Besitzer jedes Prozesses einmalig beim Klassifizieren gelesen.
+        self.track_users = bool(config.get('MULTI_INSTANCE_ENABLED', False))
+        self._tracked = {}  # pid -> TrackedProcess; die Identität (pid, create_time) steckt in entry.key
+        # pid -> create_time der Prozesse, die bereits als "kein Brave" klassifiziert wurden. Die Einfügereihenfolge
+        # ist zugleich die Prüfreihenfolge: geprüfte PIDs wandern ans Ende, beendete verschwinden mit ihrem Eintrag.
+        self._ignored = {}
+        self.sampler = self.source.create_sampler(config)
+        self.accountant = MemoryAccountant(config)
+        # Schützt den Zustand, falls Neustart-Logik und Überwachung parallel zugreifen.
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create_time(proc):
+        """Startzeit eines Prozesses; None, falls sie nicht gelesen werden darf."""
+        try:
+            return proc.create_time()
+        except psutil.AccessDenied:
+            return None
 
+    def _classify(self, proc):
+        """Gibt einen TrackedProcess zurück, falls der Prozess ein echter Brave-Prozess ist, sonst None."""
+        try:
+            # Der Name ist billig zu lesen; die Kommandozeile wird nur bei passendem Namen geholt.
+            name = proc.name() or ''
+            name_lower = name.lower()
+            match = self._name_matcher.search(name_lower)
+            if match is None or _HELPER_PROCESS_PATTERN.search(name_lower):
+                return None
+            target = self.targets[int(match.lastgroup[1:])]
+            # Sicherstellen, dass cmdline immer eine Liste ist, auch wenn psutil 'None' zurückgibt.
+            cmdline = proc.cmdline() or []
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass  # Prozess ist bereits weg oder unzugänglich, ignorieren.
-    
-    # Ermittle die aktiven Profile basierend auf den gefundenen Prozessen
-    profiles = find_active_brave_profiles(brave_processes)
+            return None
+
+        # Zuverlässigere Identifizierung von echten Brave-Prozessen.
+        # Ein kompilertes Skript (brave_ram_monitor.exe) hat keine "--type" Argumente.
+        is_real_brave_process = any(arg.startswith('--type=') for arg in cmdline)
+
+        # Der Haupt-Browser-Prozess hat oft kein '--type', aber auch keine anderen verdächtigen Argumente.
+        # Wir fügen ihn hinzu, wenn er nicht bereits als "real" identifiziert wurde.
+        is_main_brave_process = (not is_real_brave_process and cmdline and target.is_main_executable(cmdline[0])
+                                 and not _HELPER_PROCESS_PATTERN.search(os.path.basename(cmdline[0]).lower()))
+
+        if not (is_real_brave_process or is_main_brave_process):
+            return None
+        try:
+            entry = TrackedProcess(proc, name, cmdline, target)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+        if self.track_users:
+            try:
+                entry.user = proc.username()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, KeyError):
+                pass  # KeyError: UID ohne Eintrag in /etc/passwd
+        return entry
+
+    def _verify_ignored(self):
+        """
+        Prüft einen Teil der verworfenen PIDs auf eine geänderte Startzeit (wiederverwendete PID).
+        Pro Tick wird nur die Startzeit gelesen, und zwar für etwa 1/PROCESS_RESCAN_TICKS der PIDs;
+        Name und Kommandozeile werden nur für tatsächlich neue Prozesse erneut gelesen.
+        """
+        ignored = self._ignored
+        budget = -(-len(ignored) // self.rescan_ticks)
+        for pid in list(itertools.islice(ignored, budget)):
+            known = ignored.pop(pid)
+            try:
+                create_time = self._create_time(self.source.process(pid))
+            except psutil.NoSuchProcess:
+                continue
+            # Neuer Prozess unter alter PID: beim nächsten Abgleich wie eine neue PID klassifizieren.
+            if create_time == known:
+                ignored[pid] = known
+
+    def _update_process_table(self, verify=True):
+        """Gleicht die bekannten PIDs mit der aktuellen Prozessliste ab und klassifiziert nur neue Prozesse."""
+        current_pids = set(self.source.pids())
+        # Verschwundene PIDs aus beiden Tabellen entfernen.
+        for pid in self._tracked.keys() - current_pids:
+            del self._tracked[pid]
+            self.sampler.forget(pid)
+        for pid in self._ignored.keys() - current_pids:
+            del self._ignored[pid]
+        if verify:
+            self._verify_ignored()
+
+        for pid in current_pids - self._tracked.keys() - self._ignored.keys():
+            try:
+                proc = self.source.process(pid)
+                create_time = self._create_time(proc)
+            except psutil.NoSuchProcess:
+                continue
+            entry = None if pid == self._self_pid else self._classify(proc)
+            if entry is None:
+                self._ignored[pid] = create_time
+            else:
+                self._tracked[pid] = entry
+
+    def _refresh_memory(self):
+        """Aktualisiert den RAM-Verbrauch der verfolgten Prozesse und entfernt beendete bzw. wiederverwendete PIDs."""
+        for pid, entry in list(self._tracked.items()):
+            if not self.sampler.sample(entry):
+                # Beendet oder wiederverwendet: Ein Nachfolger unter derselben PID wird beim nächsten
+                # Abgleich neu klassifiziert, ein Zombie dabei samt Startzeit verworfen.
+                del self._tracked[pid]
+                self.sampler.forget(pid)
+
+    def refresh(self, verify=True):
+        """
+        Führt einen Tick durch und gibt die aktuell laufenden Brave-Prozesse als TrackedProcess-Liste zurück.
+        Mit verify=False (häufige Zwischenabfragen) werden keine verworfenen PIDs nachgeprüft.
+        """
+        with self._lock:
+            self._update_process_table(verify)
+            self._refresh_memory()
+            return list(self._tracked.values())
+
+    def get_profiles(self):
+        """
+        Gibt [(user_data_dir, Profile), ...] für jede laufende Brave-Instanz zurück (user_data_dir None = Standard).
+        Die teure Ermittlung (open_files() unter Windows) läuft nie pro Tick, sondern nur unmittelbar
+        vor einem Neustart, solange die Prozesse noch laufen.
+        """
+        with self._lock:
+            entries = list(self._tracked.values())
+        instances = [(user_data_dir, find_active_brave_profiles(group))
+                     for (_, _, user_data_dir), group in self.group_instances(entries).items()
+                     if any(entry.proc_type == 'browser' for entry in group)]
+        # Ohne bekannten Hauptprozess wird Brave wie bisher mit dem Standardprofil neu gestartet.
+        return instances or [(None, [])]
 
-    return brave_processes, total_ram_bytes / (1024 * 1024), profiles
+    @staticmethod
+    def _instance_of(entry, by_pid):
+        """
+        Ordnet einen Prozess seiner Instanz (Benutzer, user-data-dir) zu, indem die Elternkette bis zum
+        Hauptprozess verfolgt wird (Renderer hängen unter Linux am Zygote, der am Hauptprozess hängt).
+        Das Ergebnis wird am Prozess zwischengespeichert, da sich die Elternkette nicht mehr ändert.
+        """
+        node = entry
+        for _ in range(8):
+            if node.proc_type == 'browser':
+                user_data_dir = get_cmdline_switch(node.cmdline, '--user-data-dir')
+                entry.instance = (node.user, os.path.normpath(user_data_dir) if user_data_dir else None)
+                return entry.instance
+            parent = by_pid.get(node.ppid)
+            # Ein Elternprozess, der jünger als das Kind ist, hat eine wiederverwendete PID.
+            if parent is None or parent.create_time > node.create_time:
+                break
+            node = parent
+        # Hauptprozess (noch) unbekannt: vorläufig nach eigenem Benutzer und Schalter einordnen.
+        user_data_dir = get_cmdline_switch(entry.cmdline, '--user-data-dir')
+        return (entry.user, os.path.normpath(user_data_dir) if user_data_dir else None)
+
+    def group_instances(self, entries, scope='instance'):
+        """
+        Gruppiert die Prozesse eines Ticks nach Ziel und Instanz: {(Ziel, Benutzer, user-data-dir): [TrackedProcess, ...]}.
+        Mit scope='user' werden alle Instanzen eines Benutzers zusammengefasst (user-data-dir ist dann None),
+        mit scope='target' alle Instanzen eines Ziels (Benutzer und user-data-dir sind dann None).
+        """
+        by_pid = {entry.pid: entry for entry in entries}
+        groups = {}
+        for entry in entries:
+            if scope == 'target':
+                key = (entry.target, None, None)
+            else:
+                user, user_data_dir = entry.instance or self._instance_of(entry, by_pid)
+                key = (entry.target, user, None if scope == 'user' else user_data_dir)
+            groups.setdefault(key, []).append(entry)
+        return groups
+
+
+def _find_cgroup2_mount():
+    """Sucht den Einhängepunkt der cgroup-v2-Hierarchie (auch im Hybrid-Modus unter .../unified)."""
+    try:
+        with open('/proc/self/mounts', encoding='utf-8') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == 'cgroup2':
+                    return fields[1]
+    except OSError:
+        pass
+    return None
+
+def _read_cgroup_of(pid):
+    """Gibt den cgroup-v2-Pfad eines Prozesses zurück (Zeile '0::/...' in /proc/<pid>/cgroup)."""
+    with open(f"/proc/{pid}/cgroup", encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('0::'):
+                return line[3:].strip()
+    return None
+
+
+class BraveCgroup:
+    """
+    Eigene cgroup-v2-Gruppe für Brave (nur Linux).
+    Brave wird beim Neustart darin gestartet. Der Gesamtverbrauch kommt dann mit einem einzigen
+    Lesezugriff aus 'memory.current'. 'memory.high' wird aus RAM_LIMIT_MB abgeleitet, damit der
+    Kernel schon vor einem Neustart Speicher zurückfordert.
+    """
+
+    def __init__(self, mount, path):
+        self.mount = mount
+        self.path = path
+        # Pfad relativ zur Hierarchie, wie er in /proc/<pid>/cgroup steht.
+        rel_path = os.path.relpath(path, mount)
+        self.rel_path = '/' if rel_path == '.' else '/' + rel_path.replace(os.sep, '/')
+        self._membership = {}  # (pid, create_time) -> bool
+        self._events = {}
+
+    @classmethod
+    def create(cls, config):
+        """Legt die cgroup an und setzt memory.high. Gibt None zurück, wenn cgroup v2 nicht nutzbar ist."""
+        mount = _find_cgroup2_mount() if sys.platform.startswith('linux') else None
+        if not mount:
+            logging.warning("⚠️ cgroup v2 ist auf diesem System nicht verfügbar. CGROUP_ENABLED wird ignoriert.")
+            return None
+        try:
+            path = config.get('CGROUP_PATH')
+            if not path:
+                # Neben der eigenen cgroup anlegen: In der eigenen cgroup selbst darf wegen
+                # der "no internal processes"-Regel kein Memory-Controller aktiviert werden.
+                own = _read_cgroup_of('self') or '/'
+                path = os.path.join(mount, os.path.dirname(own.rstrip('/')).lstrip('/'), 'brave-ram-monitor.scope')
+            os.makedirs(path, exist_ok=True)
+
+            cgroup = cls(mount, path)
+            parent = os.path.dirname(path)
+            with open(os.path.join(parent, 'cgroup.subtree_control'), encoding='utf-8') as f:
+                controllers = f.read().split()
+            if 'memory' not in controllers:
+                with open(os.path.join(parent, 'cgroup.subtree_control'), 'w', encoding='utf-8') as f:
+                    f.write('+memory')
+            high_bytes = int(config['RAM_LIMIT_MB'] * 1024 * 1024 * config.get('CGROUP_MEMORY_HIGH_PERCENT', 90) / 100)
+            if high_bytes > 0:
+                with open(os.path.join(path, 'memory.high'), 'w', encoding='utf-8') as f:
+                    f.write(str(high_bytes))
+            cgroup.read_events()
+        except OSError as e:
+            logging.warning(f"⚠️ cgroup konnte nicht eingerichtet werden (delegierte cgroup nötig). Fehler: {e}")
+            return None
+        logging.info(f"🧩 cgroup v2 aktiv: {path} (memory.high = {high_bytes / (1024 * 1024):,.0f} MB)")
+        return cgroup
+
+    def wrap_command(self, cmdline):
+        """
+        Stellt der Kommandozeile eine kleine Shell voran, die sich selbst in die cgroup verschiebt und
+        dann per exec das eigentliche Programm startet. So liegt schon der erste Prozess in der cgroup,
+        bevor er Kindprozesse (Zygote, Renderer) erzeugt. Anders als preexec_fn ist das auch sicher,
+        wenn im Monitor mehrere Threads laufen.
+        """
+        return ['/bin/sh', '-c', 'echo 0 > "$0" 2>/dev/null; exec "$@"', os.path.join(self.path, 'cgroup.procs'), *cmdline]
+
+    def attach(self, pid):
+        """Verschiebt einen Prozess in die cgroup (Rückfallebene, falls der Wrapper keine Schreibrechte hatte)."""
+        with open(os.path.join(self.path, 'cgroup.procs'), 'w') as f:
+            f.write(str(pid))
+
+    def memory_current_bytes(self):
+        with open(os.path.join(self.path, 'memory.current'), 'rb') as f:
+            return int(f.read())
+
+    def contains_all(self, entries):
+        """Prüft, ob alle übergebenen Prozesse in der cgroup laufen. Das Ergebnis wird pro Prozess zwischengespeichert."""
+        membership = {}
+        for entry in entries:
+            member = self._membership.get(entry.key)
+            if member is None:
+                try:
+                    member = _read_cgroup_of(entry.pid) == self.rel_path
+                except OSError:
+                    member = False
+            membership[entry.key] = member
+        # Nur noch laufende Prozesse behalten.
+        self._membership = membership
+        return bool(membership) and all(membership.values())
+
+    def open_events(self):
+        """Öffnet 'memory.events' für poll(); der Kernel meldet Änderungen als POLLPRI."""
+        return os.open(os.path.join(self.path, 'memory.events'), os.O_RDONLY)
+
+    def read_events(self, fd=None):
+        """
+        Liest die Zähler aus 'memory.events' und gibt die seit dem letzten Aufruf gestiegenen zurück.
+        Mit fd wird der per open_events() geöffnete Deskriptor gelesen, was poll() wieder scharf schaltet.
+        """
+        if fd is None:
+            with open(os.path.join(self.path, 'memory.events'), 'rb') as f:
+                data = f.read()
+        else:
+            data = os.pread(fd, 4096, 0)
+        counters = {}
+        for line in data.split(b'\n'):
+            if line:
+                key, value = line.split()
+                counters[key.decode()] = int(value)
+        changed = {key: value for key, value in counters.items() if value > self._events.get(key, 0)}
+        self._events = counters
+        return changed
+
+
+_BRAVE_CGROUP = None
+
+def get_brave_cgroup(config):
+    """Gibt die Brave-cgroup zurück, wenn CGROUP_ENABLED gesetzt und die Einrichtung gelungen ist, sonst None."""
+    global _BRAVE_CGROUP
+    if not config.get('CGROUP_ENABLED', False):
+        return None
+    if _BRAVE_CGROUP is None:
+        # False merkt sich einen fehlgeschlagenen Versuch, damit die Warnung nur einmal erscheint.
+        _BRAVE_CGROUP = BraveCgroup.create(config) or False
+    return _BRAVE_CGROUP or None
+
+
+_PROCESS_TRACKER = None
+
+def get_process_tracker(config):
+    """Gibt den prozessweiten BraveProcessTracker zurück und legt ihn beim ersten Aufruf an."""
+    global _PROCESS_TRACKER
+    if _PROCESS_TRACKER is None:
+        _PROCESS_TRACKER = BraveProcessTracker(config)
+    return _PROCESS_TRACKER
+
+def get_brave_process_entries_and_memory(config):
+    """Ermittelt die verfolgten Brave-Prozesse (als TrackedProcess) und deren RAM-Verbrauch in MB."""
+    tracker = get_process_tracker(config)
+    entries = tracker.refresh()
+    cgroup = get_brave_cgroup(config)
+    # Laufen alle Brave-Prozesse in der eigenen cgroup, liefert memory.current den Gesamtverbrauch
+    # direkt. Sonst (z.B. Brave wurde vor dem Monitor gestartet) wird wie gewohnt summiert.
+    if cgroup and cgroup.contains_all(entries):
+        try:
+            return entries, cgroup.memory_current_bytes() / (1024 * 1024)
+        except OSError as e:
+            logging.debug(f"memory.current nicht lesbar, summiere stattdessen. Fehler: {e}")
+    return entries, tracker.accountant.total_bytes(entries) / (1024 * 1024)
+
+def get_memory_by_type(entries):
+    """Gruppiert die Prozesse nach '--type=' und gibt {Typ: (RSS in MB, Anzahl)} absteigend nach RAM sortiert zurück."""
+    breakdown = {}
+    for entry in entries:
+        rss_mb, count = breakdown.get(entry.proc_type, (0.0, 0))
+        breakdown[entry.proc_type] = (rss_mb + entry.rss / (1024 * 1024), count + 1)
+    return dict(sorted(breakdown.items(), key=lambda item: item[1][0], reverse=True))
+
+def select_reclaim_victims(entries, current_ram, config):
+    """
+    Wählt die größten Prozesse der TARGETED_RECLAIM_TYPES aus, bis die Überschreitung gedeckt ist
+    (höchstens TARGETED_RECLAIM_MAX_PROCESSES). Mit LEAK_RECLAIM_PRIORITY kommen verdächtig schnell
+    wachsende Prozesse zuerst an die Reihe. Gibt (Auswahl, freiwerdende Bytes) zurück.
+    current_ram ist abgerechnet (PSS/USS/cgroup), entry.rss dagegen RSS; der RSS jedes Prozesses wird
+    daher mit dem Verhältnis beider Summen umgerechnet, damit in derselben Einheit verglichen wird.
+    """
+    target_types = set(config.get('TARGETED_RECLAIM_TYPES', ['renderer', 'utility']))
+    max_processes = config.get('TARGETED_RECLAIM_MAX_PROCESSES', 3)
+    excess_bytes = (current_ram - config['RAM_LIMIT_MB']) * 1024 * 1024
+    rss_total = sum(entry.rss for entry in entries)
+    scale = current_ram * 1024 * 1024 / rss_total if rss_total else 1.0
+
+    if config.get('LEAK_RECLAIM_PRIORITY', False):
+        # Verdächtige Prozesse (nach Wachstum) vor allen übrigen (nach Größe).
+        threshold = config.get('LEAK_REPORT_MB_PER_MINUTE', 2)
+        rank = lambda e: (True, e.growth) if e.growth >= threshold else (False, e.rss)
+    else:
+        rank = lambda e: e.rss
+    candidates = sorted((e for e in entries if e.proc_type in target_types), key=rank, reverse=True)
+    victims = []
+    freed_bytes = 0
+    for entry in candidates[:max_processes]:
+        victims.append(entry)
+        freed_bytes += entry.rss * scale
+        if freed_bytes >= excess_bytes:
+            break
+    return victims, freed_bytes
+
+def reclaim_memory_targeted(entries, current_ram, config, measure=None):
+    """
+    Versucht, das RAM-Limit durch gezieltes Beenden der größten Renderer-/Utility-Prozesse
+    wieder einzuhalten, statt den ganzen Browser neu zu starten. Für den Nutzer entspricht
+    das einem abgestürzten Tab, der neu geladen werden kann.
+    measure() misst danach erneut (Standard: alle Brave-Prozesse).
+    Gibt die neu ermittelten Prozesse und den neuen RAM-Verbrauch in MB zurück.
+    """
+    victims, freed_bytes = select_reclaim_victims(entries, current_ram, config)
+    if not victims:
+        logging.info("Keine passenden Prozesse für gezieltes Beenden gefunden.")
+        return entries, current_ram
+
+    logging.warning(f"🎯 Beende gezielt {len(victims)} Prozess(e), um ca. {freed_bytes / (1024 * 1024):,.0f} MB freizugeben...")
+    stage_start = time.monotonic()
+    procs = []
+    for entry in victims:
+        logging.info(f"  -> {entry.proc_type} (PID: {entry.pid}): {entry.rss / (1024 * 1024):,.0f} MB")
+        try:
+            entry.proc.terminate()
+            procs.append(entry.proc)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    _, alive = wait_for_processes_exit(procs, config.get('TARGETED_RECLAIM_WAIT_SECONDS', 2))
+    for proc in alive:
+        try:
+            proc.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    _METRICS.record_stage('targeted_kill', time.monotonic() - stage_start)
+
+    entries, current_ram = measure() if measure else get_brave_process_entries_and_memory(config)
+    logging.info(f"RAM-Nutzung nach gezieltem Beenden: {current_ram:,.2f} MB / {config['RAM_LIMIT_MB']:,} MB")
+    return entries, current_ram
+
+class MetricsRegistry:
+    """
+    Sammelt Kennzahlen für den Prometheus-Endpunkt. Der Text im Prometheus-Textformat
+    wird einmal pro Messung vorgerendert; Abfragen liefern nur diesen Schnappschuss aus und
+    lösen nie selbst eine Messung aus.
+    """
+    STAGES = ('targeted_kill', 'wm_close', 'taskkill_graceful', 'taskkill_force', 'posix_terminate', 'kill')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stage_counts = dict.fromkeys(self.STAGES, 0)
+        self._stage_seconds = dict.fromkeys(self.STAGES, 0.0)
+        self._relaunches = 0
+        self._recovery_seconds_total = 0.0
+        self._last_recovery_seconds = 0.0
+        self._profile_launches = {'ready': 0, 'timeout': 0}
+        self._profile_seconds_total = 0.0
+        self.snapshot = b''
+
+    def record_stage(self, stage, seconds):
+        """Zählt eine ausgeführte Freigabe-/Neustart-Stufe und ihre Dauer."""
+        with self._lock:
+            self._stage_counts[stage] += 1
+            self._stage_seconds[stage] += seconds
+
+    def record_relaunch(self, recovery_seconds, results):
+        """Zählt einen gestaffelten Neustart: Zeit bis alle Profile bereit sind und [(Profil, Sekunden, bereit)]."""
+        with self._lock:
+            self._relaunches += 1
+            self._recovery_seconds_total += recovery_seconds
+            self._last_recovery_seconds = recovery_seconds
+            for _, seconds, ready in results:
+                self._profile_launches['ready' if ready else 'timeout'] += 1
+                self._profile_seconds_total += seconds
+
+    def update(self, sample, ram_limit, target='brave'):
+        """
+        Rendert den Schnappschuss für eine neue Messung (MonitorSample). Verbrauch und Limit tragen die
+        Labels target und instance; ohne sample.instances gibt es genau eine Instanz (target, target).
+        """
+        instances = sample.instances or [(target, target, sample.total_mb, ram_limit, sample.entries)]
+        with self._lock:
+            stage_counts = dict(self._stage_counts)
+            stage_seconds = dict(self._stage_seconds)
+            relaunches, recovery_total, last_recovery = self._relaunches, self._recovery_seconds_total, self._last_recovery_seconds
+            profile_launches, profile_seconds = dict(self._profile_launches), self._profile_seconds_total
+
+        lines = []
+        def metric(name, kind, help_text, values):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in values:
+                label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        breakdowns = [({'target': name, 'instance': label}, get_memory_by_type(entries)) for name, label, _, _, entries in instances]
+        metric('brave_memory_bytes', 'gauge', "Abgerechneter RAM-Verbrauch je Instanz.",
+               [({'target': name, 'instance': label}, round(total_mb * 1024 * 1024)) for name, label, total_mb, _, _ in instances])
+        metric('brave_memory_by_type_bytes', 'gauge', "RSS je Instanz und Prozesstyp (--type=).",
+               [({**labels, 'type': proc_type}, round(rss_mb * 1024 * 1024)) for labels, breakdown in breakdowns for proc_type, (rss_mb, _) in breakdown.items()])
+        metric('brave_processes', 'gauge', "Anzahl der Prozesse je Instanz und Prozesstyp.",
+               [({**labels, 'type': proc_type}, count) for labels, breakdown in breakdowns for proc_type, (_, count) in breakdown.items()])
+        metric('brave_memory_limit_bytes', 'gauge', "RAM-Limit je Instanz.",
+               [({'target': name, 'instance': label}, round(limit_mb * 1024 * 1024)) for name, label, _, limit_mb, _ in instances])
+        metric('brave_monitor_scan_duration_seconds', 'gauge', "Dauer der letzten Messung.", [({}, f"{sample.scan_seconds:.6f}")])
+        metric('brave_monitor_last_sample_timestamp_seconds', 'gauge', "Zeitpunkt der letzten Messung.", [({}, f"{sample.timestamp:.3f}")])
+        metric('brave_restart_stage_total', 'counter', "Ausgeführte Freigabe-/Neustart-Stufen.",
+               [({'stage': stage}, count) for stage, count in stage_counts.items()])
+        metric('brave_restart_stage_seconds_total', 'counter', "In den Freigabe-/Neustart-Stufen verbrachte Zeit.",
+               [({'stage': stage}, f"{seconds:.3f}") for stage, seconds in stage_seconds.items()])
+        metric('brave_relaunch_total', 'counter', "Gestaffelte Neustarts.", [({}, relaunches)])
+        metric('brave_relaunch_recovery_seconds', 'gauge', "Zeit vom ersten Start bis alle Profile bereit waren (letzter Neustart).", [({}, f"{last_recovery:.3f}")])
+        metric('brave_relaunch_recovery_seconds_total', 'counter', "Summe der Zeiten bis zur Wiederherstellung.", [({}, f"{recovery_total:.3f}")])
+        metric('brave_profile_launch_total', 'counter', "Gestartete Profile nach Ergebnis (bereit oder Zeitüberschreitung).",
+               [({'result': result}, count) for result, count in profile_launches.items()])
+        metric('brave_profile_launch_seconds_total', 'counter', "Summe der Startzeiten aller Profile.", [({}, f"{profile_seconds:.3f}")])
+        # Referenzzuweisung ist atomar; der HTTP-Thread sieht immer einen vollständigen Schnappschuss.
+        self.snapshot = ("\n".join(lines) + "\n").encode('utf-8')
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_METRICS = MetricsRegistry()
+
+
+class _MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Liefert den vorgerenderten Schnappschuss unter /metrics aus."""
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = _METRICS.snapshot
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("Metrics-Abfrage: " + format % args)
+
+
+def start_metrics_server(config):
+    """Startet den HTTP-Endpunkt für Prometheus in einem Daemon-Thread. Gibt den Server oder None zurück."""
+    bind = config.get('METRICS_BIND', '127.0.0.1')
+    port = config.get('METRICS_PORT', 9464)
+    try:
+        server = http.server.ThreadingHTTPServer((bind, port), _MetricsRequestHandler)
+    except OSError as e:
+        logging.error(f"❌ Metrics-Endpunkt konnte nicht gestartet werden ({bind}:{port}). Fehler: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='brave-monitor-metrics', daemon=True).start()
+    logging.info(f"📡 Prometheus-Metriken unter http://{bind}:{port}/metrics")
+    return server
+
+
+def describe_process(proc):
+    """Gibt den Prozessnamen zurück, ohne bei bereits beendeten Prozessen einen Fehler zu werfen."""
+    try:
+        return proc.name()
+    except psutil.Error:
+        return "?"
+
+def _log_process_exit(proc):
+    logging.debug(f"   Prozess {proc.pid} beendet.")
+
+def _wait_for_pidfds(procs, deadline, callback, gone):
+    """
+    Linux-Variante von wait_for_processes_exit: blockiert per poll() auf pidfds bis zum letzten Prozessende.
+    Beendete Prozesse landen sofort (nach dem Callback) in 'gone', damit der Aufrufer bei einem
+    Fehler mittendrin nur noch auf die übrigen wartet.
+    """
+    poller = select.poll()
+    pidfds = {}
+    try:
+        for proc in procs:
+            try:
+                fd = os.pidfd_open(proc.pid)
+            except ProcessLookupError:
+                gone.append(proc)
+                callback(proc)
+                continue
+            pidfds[fd] = proc
+            # Der pidfd ist jetzt an den Prozess gebunden; prüfen, dass die PID nicht neu vergeben wurde.
+            if not proc.is_running():
+                del pidfds[fd]
+                os.close(fd)
+                gone.append(proc)
+                callback(proc)
+                continue
+            poller.register(fd, select.POLLIN)
+
+        while pidfds:
+            remaining_ms = (deadline - time.monotonic()) * 1000
+            if remaining_ms <= 0:
+                break
+            for fd, _ in poller.poll(remaining_ms):
+                proc = pidfds.pop(fd)
+                poller.unregister(fd)
+                os.close(fd)
+                gone.append(proc)
+                callback(proc)
+        return gone, list(pidfds.values())
+    finally:
+        for fd in pidfds:
+            os.close(fd)
+
+def wait_for_processes_exit(procs, timeout, callback=_log_process_exit):
+    """
+    Wartet, bis alle übergebenen Prozesse beendet sind, höchstens aber 'timeout' Sekunden.
+    Kehrt sofort zurück, sobald der letzte Prozess beendet ist. Gibt (beendet, noch_aktiv) zurück.
+    """
+    deadline = time.monotonic() + timeout
+    gone = []
+    # pidfds nur für echte Prozesse; synthetische Prozesse (Benchmark) implementieren wait() selbst.
+    if hasattr(os, 'pidfd_open') and all(isinstance(proc, psutil.Process) for proc in procs):
+        try:
+            return _wait_for_pidfds(procs, deadline, callback, gone)
+        except OSError as e:
+            # z.B. Kernel ohne pidfd-Unterstützung (vor 5.3) oder keine freien Deskriptoren mehr
+            logging.debug(f"pidfd nicht verfügbar, verwende psutil.wait_procs. Fehler: {e}")
+            # Bereits gemeldete Prozesse nicht ein zweites Mal an wait_procs übergeben.
+            reported = {id(proc) for proc in gone}
+            procs = [proc for proc in procs if id(proc) not in reported]
+    more_gone, alive = psutil.wait_procs(procs, timeout=max(0.0, deadline - time.monotonic()), callback=callback)
+    return gone + more_gone, alive
 
 def log_taskkill_result(result, mode="Graceful"):
     """Loggt das Ergebnis eines 'taskkill'-Befehls."""
@@ -238,11 +1248,32 @@ def log_taskkill_result(result, mode="Graceful"):
     return True
 
 
-def restart_brave(processes_to_kill, config, have_pywin32):
-    """Führt einen mehrstufigen, sauberen Shutdown der Brave-Prozesse durch."""
+def restart_brave(processes_to_kill, config, have_pywin32, scoped=False):
+    """
+    Führt einen mehrstufigen, sauberen Shutdown der Brave-Prozesse durch.
+    Mit scoped=True beendet taskkill nur die übergebenen PIDs statt aller Prozesse mit PROCESS_NAME
+    (systemweiter Modus: die Instanzen anderer Benutzer bleiben unberührt).
+    SHUTDOWN_STRATEGY wählt das Vorgehen: 'graceful' (unter Windows WM_CLOSE und taskkill),
+    'terminate' (terminate an die Hauptprozesse, dann kill) oder 'kill' (alle Prozesse sofort).
+    """
     log_section(f"🔥 RAM-Limit überschritten. Starte Neustart-Prozedur.", level=logging.WARNING)
+    strategy = config.get('SHUTDOWN_STRATEGY', 'graceful')
 
-    if IS_WINDOWS:
+    if strategy == 'kill':
+        logging.info(f"Beende {len(processes_to_kill)} Prozess(e) sofort (kill)...")
+        stage_start = time.monotonic()
+        for p in processes_to_kill:
+            try:
+                p.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        _, remaining = wait_for_processes_exit(processes_to_kill, 2)
+        _METRICS.record_stage('kill', time.monotonic() - stage_start)
+        if remaining:
+            logging.warning(f"{len(remaining)} Prozess(e) konnten nicht beendet werden.")
+    elif IS_WINDOWS and strategy == 'graceful':
+        # Noch laufende Prozesse; jede Stufe wartet nur noch auf diese bekannten PIDs.
+        remaining = list(processes_to_kill)
         # Stufe 1: Sanftes Beenden via pywin32 (bevorzugt)
         if have_pywin32:
             try:
@@ -253,6 +1284,7 @@ def restart_brave(processes_to_kill, config, have_pywin32):
                 # Dies ist die sauberste Methode: Wir simulieren einen Klick auf das "X" des Fensters.
                 # Der Browser erhält eine WM_CLOSE-Nachricht und kann seine Sitzung ordnungsgemäß speichern.
                 logging.info("Stufe 1: Sende WM_CLOSE an Brave-Fenster (Graceful via pywin32)...")
+                stage_start = time.monotonic()
                 pids_to_kill = set()
                 for p in processes_to_kill:
                     try:
@@ -277,48 +1309,53 @@ def restart_brave(processes_to_kill, config, have_pywin32):
                 except Exception as e:
                     logging.debug(f"EnumWindows/WM_CLOSE schlug fehl, fahre mit taskkill fort. Fehler: {e}")
 
-                # --- Robuster Polling-Mechanismus für Stufe 1 ---
+                # --- Ereignisgesteuertes Warten für Stufe 1 ---
                 total_wait_time = config.get('WM_CLOSE_WAIT_SECONDS', 10) + 5 # Gesamtzeit, um auf den sanften Shutdown zu warten
-                for i in range(total_wait_time):
-                    procs, _, _ = get_brave_processes_and_memory_and_profiles(config)
-                    if not procs:
-                        logging.info(f"✅ Stufe 1 war erfolgreich. Alle Prozesse nach {i+1}s beendet.")
-                        return
-                    time.sleep(1)
-                
-                # Wenn wir hier ankommen, ist der Polling-Timeout abgelaufen.
-                final_procs, _, _ = get_brave_processes_and_memory_and_profiles(config)
-                if final_procs:
-                    # Detailliertes Logging zur Identifizierung des verbleibenden Prozesses
-                    proc_details = [f"'{p.name()}' (PID: {p.pid})" for p in final_procs]
-                    logging.warning(f"Stufe 1 Timeout. {len(final_procs)} Prozess(e) noch aktiv. Eskaliere zu Stufe 2.")
-                    logging.info(f"  -> Verbleibende(r) Prozess(e): {', '.join(proc_details)}")
+                _, remaining = wait_for_processes_exit(remaining, total_wait_time)
+                _METRICS.record_stage('wm_close', time.monotonic() - stage_start)
+                if not remaining:
+                    logging.info(f"✅ Stufe 1 war erfolgreich. Alle Prozesse nach {time.monotonic() - stage_start:.1f}s beendet.")
+                    return
 
+                # Wenn wir hier ankommen, ist der Timeout abgelaufen.
+                # Detailliertes Logging zur Identifizierung des verbleibenden Prozesses
+                proc_details = [f"'{describe_process(p)}' (PID: {p.pid})" for p in remaining]
+                logging.warning(f"Stufe 1 Timeout. {len(remaining)} Prozess(e) noch aktiv. Eskaliere zu Stufe 2.")
+                logging.info(f"  -> Verbleibende(r) Prozess(e): {', '.join(proc_details)}")
+
+
+        def taskkill_targets():
+            if scoped:
+                return [arg for p in remaining for arg in ("/PID", str(p.pid))]
+            return ["/IM", config['PROCESS_NAME'] + ".exe"]
 
         # --- Stufe 2: Graceful Taskkill ---
         # Dieser Block wird nur erreicht, wenn Stufe 1 (falls versucht) nicht alle Prozesse beendet hat.
         logging.info("Stufe 2: Sende Anfrage zum Schließen via taskkill (Graceful)...")
-        result = subprocess.run(["taskkill", "/IM", config['PROCESS_NAME'] + ".exe", "/T"], capture_output=True, text=True, encoding='utf-8', errors='ignore')
+        stage_start = time.monotonic()
+        result = subprocess.run(["taskkill", *taskkill_targets(), "/T"], capture_output=True, text=True, encoding='utf-8', errors='ignore')
         log_taskkill_result(result, "Graceful")
-        time.sleep(config['GRACEFUL_SHUTDOWN_WAIT_SECONDS'])
 
         # --- Prüfung direkt nach Stufe 2 ---
-        procs, _, _ = get_brave_processes_and_memory_and_profiles(config)
-        if not procs:
+        _, remaining = wait_for_processes_exit(remaining, config['GRACEFUL_SHUTDOWN_WAIT_SECONDS'])
+        _METRICS.record_stage('taskkill_graceful', time.monotonic() - stage_start)
+        if not remaining:
             logging.info("✅ Stufe 2 war erfolgreich. Alle Prozesse wurden beendet.")
             return
 
         # --- Stufe 3: Force Kill ---
         # Dieser Block wird nur erreicht, wenn auch Stufe 2 nicht alle Prozesse beendet hat.
         logging.warning("Graceful Shutdown fehlgeschlagen. Erzwinge das Beenden (Stufe 3)...")
-        result = subprocess.run(["taskkill", "/F", "/IM", config['PROCESS_NAME'] + ".exe", "/T"], capture_output=True, text=True, encoding='utf-8', errors='ignore')
+        stage_start = time.monotonic()
+        result = subprocess.run(["taskkill", "/F", *taskkill_targets(), "/T"], capture_output=True, text=True, encoding='utf-8', errors='ignore')
         log_taskkill_result(result, "Force")
-        time.sleep(2)
         # Letzte Prüfung, um sicherzustellen, dass alles beendet ist.
-        if not get_brave_processes_and_memory_and_profiles(config)[0]:
+        _, remaining = wait_for_processes_exit(remaining, 2)
+        _METRICS.record_stage('taskkill_force', time.monotonic() - stage_start)
+        if not remaining:
             logging.info("✅ Stufe 3 war erfolgreich. Alle Prozesse wurden beendet.")
     else:
-        # Sauberes Beenden für POSIX-Systeme (Linux, macOS)
+        # Sauberes Beenden für POSIX-Systeme (Linux, macOS) bzw. SHUTDOWN_STRATEGY 'terminate'
         pids_to_kill = {p.pid for p in processes_to_kill if hasattr(p, 'pid')}
         parent_procs = []
         for p in processes_to_kill:
@@ -329,42 +1366,410 @@ def restart_brave(processes_to_kill, config, have_pywin32):
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 continue
         logging.info(f"Sende 'terminate' Signal an {len(parent_procs)} Brave-Hauptprozess(e)...")
+        stage_start = time.monotonic()
         for p in parent_procs:
-            safe_terminate_process(p)
-        time.sleep(config['GRACEFUL_SHUTDOWN_WAIT_SECONDS'])
+            try:
+                p.terminate()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass # Prozess ist bereits weg oder Zugriff verweigert, alles ok.
+        # Die Hauptprozesse beenden ihre Kindprozesse selbst; wir warten auf alle bekannten PIDs.
+        _, remaining = wait_for_processes_exit(processes_to_kill, config['GRACEFUL_SHUTDOWN_WAIT_SECONDS'])
+        if not remaining:
+            _METRICS.record_stage('posix_terminate', time.monotonic() - stage_start)
+            logging.info(f"✅ Alle Prozesse nach {time.monotonic() - stage_start:.1f}s beendet.")
+            return
+        logging.warning(f"{len(remaining)} Prozess(e) haben nicht auf terminate reagiert. Erzwinge Beenden (kill)...")
+        for p in remaining:
+            try:
+                p.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        wait_for_processes_exit(remaining, 2)
+        _METRICS.record_stage('posix_terminate', time.monotonic() - stage_start)
+
+class LaunchIdentity:
+    """Benutzer, unter dem eine Brave-Instanz lief, samt Umgebung bzw. Sitzung für den Neustart als dieser Benutzer."""
+    __slots__ = ('user', 'env', 'session_id')
+
+    def __init__(self, user, env=None, session_id=None):
+        self.user = user
+        self.env = env
+        self.session_id = session_id
+
+_CURRENT_USER = None
+
+def _current_username():
+    global _CURRENT_USER
+    if _CURRENT_USER is None:
+        try:
+            _CURRENT_USER = psutil.Process(os.getpid()).username()
+        except (psutil.Error, KeyError):
+            _CURRENT_USER = ''
+    return _CURRENT_USER
 
-def start_brave(brave_path, profiles):
-    """Startet Brave mit den angegebenen Profilen."""
+def capture_launch_identity(entry):
+    """
+    Hält fest, wie der Hauptprozess einer fremden Instanz neu gestartet werden muss (vor dem Beenden aufrufen).
+    Gibt None zurück, wenn die Instanz dem Benutzer des Monitors gehört.
+    """
+    if not entry.user or entry.user == _current_username():
+        return None
+    env = session_id = None
+    try:
+        # Enthält DISPLAY, XDG_RUNTIME_DIR, DBUS_SESSION_BUS_ADDRESS usw. der grafischen Sitzung.
+        env = entry.proc.environ()
+    except (psutil.Error, OSError):
+        pass
+    if IS_WINDOWS:
+        try:
+            import win32ts
+            session_id = win32ts.ProcessIdToSessionId(entry.pid)
+        except Exception as e:
+            logging.debug(f"Sitzung von PID {entry.pid} nicht ermittelbar: {e}")
+    return LaunchIdentity(entry.user, env, session_id)
+
+def _launch_process(cmdline, cgroup=None, launch_as=None):
+    """
+    Startet einen Prozess, bei Bedarf als anderer Benutzer (POSIX: als root, Windows: als SYSTEM-Dienst)
+    und innerhalb der übergebenen cgroup. Gibt die PID des gestarteten Prozesses zurück.
+    """
+    if cgroup:
+        pid = _launch_process(cgroup.wrap_command(cmdline), None, launch_as)
+        try:
+            cgroup.attach(pid)
+        except OSError as e:
+            logging.debug(f"PID {pid} konnte nicht in die cgroup verschoben werden: {e}")
+        return pid
+    if launch_as is None:
+        return subprocess.Popen(cmdline).pid
+    elif IS_WINDOWS:
+        import win32con, win32process, win32profile, win32ts
+        if launch_as.session_id is None:
+            raise OSError(f"Keine Sitzung für Benutzer '{launch_as.user}' bekannt")
+        token = win32ts.WTSQueryUserToken(launch_as.session_id)
+        environment = win32profile.CreateEnvironmentBlock(token, False)
+        startup = win32process.STARTUPINFO()
+        startup.lpDesktop = 'winsta0\\default'
+        handles = win32process.CreateProcessAsUser(token, None, subprocess.list2cmdline(cmdline), None, None, False,
+                                                   win32con.CREATE_UNICODE_ENVIRONMENT, environment, None, startup)
+        for handle in handles[:2]:
+            handle.Close()
+        token.Close()
+        return handles[2]
+    else:
+        import pwd
+        account = pwd.getpwnam(launch_as.user)
+        env = launch_as.env or {'HOME': account.pw_dir, 'USER': account.pw_name, 'LOGNAME': account.pw_name, 'PATH': os.environ.get('PATH', '')}
+        return subprocess.Popen(cmdline, user=account.pw_uid, group=account.pw_gid, extra_groups=os.getgrouplist(account.pw_name, account.pw_gid),
+                                env=env, cwd=account.pw_dir, start_new_session=True).pid
+
+def start_brave(brave_path, profiles, cgroup=None, user_data_dir=None, launch_as=None, scheduler=None):
+    """
+    Startet Brave mit den angegebenen Profilen (optional mit eigenem Datenverzeichnis und innerhalb der übergebenen cgroup).
+    Mit launch_as (LaunchIdentity) wird Brave als der Benutzer gestartet, dem die beendete Instanz gehörte.
+    Mit scheduler (LaunchScheduler) starten die Profile gestaffelt, und der Aufruf kehrt erst zurück, wenn alle bereit sind.
+    """
     current_brave_path = brave_path or find_brave_executable_path()
-    if current_brave_path:
+    extra_args = [f'--user-data-dir={user_data_dir}'] if user_data_dir else []
+    # Der neue Prozess tritt der cgroup noch vor dem exec von Brave bei; alle Kindprozesse erben sie.
+    if current_brave_path and scheduler:
+        launches = [(profile, [current_brave_path, *extra_args, f'--profile-directory={profile}']) for profile in profiles]
+        scheduler.run(launches or [('Standard', [current_brave_path, *extra_args])], cgroup, launch_as)
+    elif current_brave_path:
         if profiles:
             logging.info(f"🚀 Starte Brave mit {len(profiles)} gefundenen Profilen neu...")
             for profile in profiles:
                 logging.info(f"  -> Starte Profil: {profile}")
                 try:
-                    subprocess.Popen([current_brave_path, f'--profile-directory={profile}'])
+                    _launch_process([current_brave_path, *extra_args, f'--profile-directory={profile}'], cgroup, launch_as)
                 except Exception as e:
                     logging.error(f"❌ Fehler beim Neustart von Profil '{profile}': {e}")
         else:
             logging.info(f"🚀 Starte Brave neu (keine spezifischen Profile gefunden): {current_brave_path}")
             try:
-                subprocess.Popen([current_brave_path])
+                _launch_process([current_brave_path, *extra_args], cgroup, launch_as)
             except Exception as e:
                 logging.error(f"❌ Fehler beim Neustart: {e}")
         logging.info("✅ Neustart-Befehle gesendet. Überwachung wird fortgesetzt.")
     else:
         logging.warning("⚠️ Kein Brave-Pfad gefunden. Manueller Neustart erforderlich.")
 
-def safe_terminate_process(proc):
-    """Beendet einen Prozess sicher mit Fehlerbehandlung und eskaliert zu kill, falls nötig."""
+class _PendingLaunch:
+    __slots__ = ('label', 'pid', 'started')
+
+    def __init__(self, label, pid, started):
+        self.label = label
+        self.pid = pid
+        self.started = started
+
+
+class LaunchScheduler:
+    """
+    Startet Profile gestaffelt statt alle auf einmal: höchstens LAUNCH_CONCURRENCY gleichzeitig.
+    Beobachtet werden die Prozessbäume unter allen in diesem Lauf gestarteten Prozessen. Bei einem
+    gemeinsamen user-data-dir übergeben die Starts 2..N an den Hauptprozess des ersten und beenden sich;
+    deren Fenster und Renderer entstehen dann im Baum des ersten Starts. Laufende Starts gelten als bereit,
+    sobald diese Prozessmenge seit ihrem Start für LAUNCH_READY_STABLE_SECONDS weder neue noch beendete
+    Prozesse zeigt und ihr RSS um höchstens LAUNCH_READY_TOLERANCE_MB schwankt. Die Prozesse liefert der
+    BraveProcessTracker, es gibt also keinen zusätzlichen Scan.
+    instance ist der Schlüssel (Ziel, Benutzer, user-data-dir) der neu gestarteten Instanz wie in
+    BraveProcessTracker.group_instances; andere Instanzen und Ziele auf dem Rechner werden nie beobachtet.
+    """
+
+    def __init__(self, config, tracker, instance):
+        self.tracker = tracker
+        self.instance = instance
+        self.concurrency = max(1, int(config.get('LAUNCH_CONCURRENCY', 2)))
+        self.stable_seconds = config.get('LAUNCH_READY_STABLE_SECONDS', 3)
+        self.tolerance_mb = config.get('LAUNCH_READY_TOLERANCE_MB', 25)
+        self.timeout = config.get('LAUNCH_READY_TIMEOUT_SECONDS', 60)
+        self.poll = max(0.05, config.get('LAUNCH_POLL_SECONDS', 0.5))
+        self._roots = []  # PIDs der in diesem Lauf gestarteten Prozesse
+        self._pids = frozenset()  # Beobachtete Prozesse beim letzten Poll
+        self._mb = 0.0
+        self._last_change = 0.0
+
+    def _watched(self, entries):
+        """
+        Gibt (PIDs, RSS in MB) der beobachteten Prozesse zurück: alle verfolgten Prozesse unterhalb der
+        gestarteten PIDs. Ist keiner davon (mehr) vorhanden, etwa nach einer Übergabe an einen nicht von
+        hier gestarteten Hauptprozess, werden alle Prozesse derselben Instanz beobachtet.
+        """
+        by_pid = {entry.pid: entry for entry in entries}
+        children = {}
+        for entry in entries:
+            children.setdefault(entry.ppid, []).append(entry.pid)
+        pids = set()
+        stack = list(self._roots)
+        while stack:
+            pid = stack.pop()
+            if pid not in pids:
+                pids.add(pid)
+                stack.extend(children.get(pid, ()))
+        pids.intersection_update(by_pid)
+        if not pids:
+            pids = {entry.pid for entry in self.tracker.group_instances(entries).get(self.instance, ())}
+        return frozenset(pids), sum(by_pid[pid].rss for pid in pids) / (1024 * 1024)
+
+    def _poll(self, active, now):
+        """Aktualisiert die beobachteten Prozesse und gibt die bereiten bzw. abgelaufenen Starts zurück."""
+        # Kein voller Tick: die Nachprüfung verworfener PIDs bleibt der regulären Messung vorbehalten.
+        pids, mb = self._watched(self.tracker.refresh(verify=False))
+        if pids != self._pids or abs(mb - self._mb) > self.tolerance_mb:
+            self._pids, self._mb, self._last_change = pids, mb, now
+        finished = []
+        for launch in active:
+            elapsed = now - launch.started
+            if now - max(self._last_change, launch.started) >= self.stable_seconds:
+                logging.info(f"✅ Profil '{launch.label}' bereit nach {elapsed:.1f}s (Instanz: {len(pids)} Prozesse, {mb:,.0f} MB).")
+                finished.append((launch, elapsed, True))
+            elif elapsed >= self.timeout:
+                logging.warning(f"⏱️ Profil '{launch.label}' nach {elapsed:.1f}s noch nicht zur Ruhe gekommen. Fahre fort.")
+                finished.append((launch, elapsed, False))
+        return finished
+
+    def run(self, launches, cgroup=None, launch_as=None):
+        """
+        Startet [(Profil, Kommandozeile), ...] und wartet, bis alle bereit sind (blockierend).
+        Gibt [(Profil, Sekunden bis bereit, bereit)] zurück; bereit=False bei Zeitüberschreitung.
+        """
+        pending = collections.deque(launches)
+        active = []
+        results = []
+        start = time.monotonic()
+        self._roots, self._pids, self._mb, self._last_change = [], frozenset(), 0.0, start
+        logging.info(f"🚀 Starte {len(pending)} Profil(e) gestaffelt (höchstens {self.concurrency} gleichzeitig)...")
+        while pending or active:
+            while pending and len(active) < self.concurrency:
+                label, cmdline = pending.popleft()
+                logging.info(f"  -> Starte Profil: {label}")
+                try:
+                    pid = _launch_process(cmdline, cgroup, launch_as)
+                except Exception as e:
+                    logging.error(f"❌ Fehler beim Neustart von Profil '{label}': {e}")
+                    continue
+                self._roots.append(pid)
+                active.append(_PendingLaunch(label, pid, time.monotonic()))
+            if not active:
+                break
+            time.sleep(self.poll)
+            for launch, elapsed, ready in self._poll(active, time.monotonic()):
+                active.remove(launch)
+                results.append((launch.label, elapsed, ready))
+        recovery = time.monotonic() - start
+        if results:
+            logging.info(f"✅ {sum(1 for _, _, ready in results if ready)}/{len(results)} Profil(e) nach {recovery:.1f}s bereit. Überwachung wird fortgesetzt.")
+            _METRICS.record_relaunch(recovery, results)
+        return results
+
+
+class MemoryTrend:
+    """
+    Glättet den Verlauf des RAM-Verbrauchs (EWMA über Wert und Steigung) und sagt voraus,
+    wann das Limit überschritten wird. Daraus ergibt sich das nächste Prüfintervall:
+    kurz, wenn eine Überschreitung naht, und lang, solange der Verbrauch stabil ist.
+    """
+
+    def __init__(self, config):
+        self.alpha = config.get('TREND_SMOOTHING', 0.3)
+        self.base_interval = config.get('CHECK_INTERVAL_SECONDS', 60)
+        self.adaptive = config.get('ADAPTIVE_INTERVAL_ENABLED', True)
+        self.min_interval = min(config.get('MIN_CHECK_INTERVAL_SECONDS', 1), self.base_interval)
+        self.max_interval = max(config.get('MAX_CHECK_INTERVAL_SECONDS', 120), self.base_interval)
+        self.flat_mb_per_minute = config.get('TREND_FLAT_MB_PER_MINUTE', 10)
+        self.reset()
+
+    def reset(self):
+        """Verwirft den bisherigen Verlauf, z.B. nach einem Neustart."""
+        self.last_time = None
+        self.last_mb = None
+        self.slope = 0.0  # geglättete Steigung in MB/s
+        self.interval = self.base_interval
+
+    def update(self, current_mb, now=None):
+        """Nimmt einen neuen Messwert auf."""
+        now = time.monotonic() if now is None else now
+        if self.last_time is not None and now > self.last_time:
+            observed_slope = (current_mb - self.last_mb) / (now - self.last_time)
+            self.slope = self.alpha * observed_slope + (1 - self.alpha) * self.slope
+        self.last_time = now
+        self.last_mb = current_mb
+
+    def seconds_until(self, limit_mb):
+        """Vorhergesagte Zeit in Sekunden bis zum Erreichen des Limits (inf, wenn der Verbrauch nicht steigt)."""
+        if self.last_mb is None or self.slope <= 0:
+            return float('inf')
+        return max(0.0, (limit_mb - self.last_mb) / self.slope)
+
+    def next_interval(self, limit_mb):
+        """Berechnet das nächste Prüfintervall in Sekunden."""
+        if not self.adaptive:
+            return self.base_interval
+        time_to_limit = self.seconds_until(limit_mb)
+        if abs(self.slope) * 60 < self.flat_mb_per_minute:
+            # Stabiler Verbrauch: Intervall schrittweise verlängern.
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        elif time_to_limit != float('inf'):
+            # Mehrere Messungen vor der vorhergesagten Überschreitung einplanen.
+            self.interval = min(self.base_interval, time_to_limit / 4)
+        else:
+            self.interval = self.base_interval
+        if self.last_mb is not None and limit_mb > 0:
+            # Ab halber Auslastung schrumpft die Obergrenze mit dem verbleibenden Abstand zum Limit,
+            # damit ein Leck, das knapp unter dem Limit beginnt, nicht bis zu MAX_CHECK_INTERVAL_SECONDS unbemerkt bleibt.
+            headroom = max(0.0, 1 - self.last_mb / limit_mb)
+            self.interval = min(self.interval, self.max_interval * min(1.0, 2 * headroom))
+        self.interval = max(self.min_interval, self.interval)
+        return self.interval
+
+
+class EventWaiter:
+    """
+    Wartet bis zur nächsten Prüfung, wacht aber vorzeitig auf, wenn eine registrierte
+    Kernel-Quelle (z.B. 'memory.events' der cgroup oder ein PSI-Trigger) per poll() ein Ereignis meldet.
+    Ohne registrierte Quellen entspricht das einem einfachen time.sleep().
+    """
+
+    def __init__(self):
+        self._poller = select.poll() if hasattr(select, 'poll') else None
+        self._handlers = {}  # fd -> (Art, handler(fd)); der Handler gibt eine Beschreibung oder None zurück
+
+    def register(self, fd, kind, handler, events=None):
+        """Registriert einen Deskriptor. Der Handler entscheidet, ob das Ereignis relevant ist."""
+        if self._poller is None:
+            return False
+        self._poller.register(fd, events if events is not None else select.POLLPRI | select.POLLERR)
+        self._handlers[fd] = (kind, handler)
+        return True
+
+    def has_sources(self):
+        return bool(self._handlers)
+
+    def unregister(self, fd):
+        """Entfernt einen Deskriptor und schließt ihn."""
+        if self._handlers.pop(fd, None):
+            self._poller.unregister(fd)
+            os.close(fd)
+
+    def wait(self, timeout):
+        """Wartet höchstens 'timeout' Sekunden. Gibt die eingetretenen Ereignisse als (Art, Beschreibung) zurück."""
+        if not self._handlers:
+            time.sleep(timeout)
+            return []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining_ms = (deadline - time.monotonic()) * 1000
+            if remaining_ms <= 0:
+                return []
+            events = []
+            for fd, revents in self._poller.poll(remaining_ms):
+                kind, handler = self._handlers[fd]
+                reason = handler(fd, revents)
+                if reason:
+                    events.append((kind, reason))
+            if events:
+                return events
+
+
+def open_psi_trigger(config):
+    """
+    Registriert einen PSI-Trigger (pressure stall information) für Speicher und gibt den Deskriptor zurück.
+    Der Kernel meldet per POLLPRI, sobald die Stall-Zeit im Zeitfenster die Schwelle überschreitet.
+    Quelle ist /proc/pressure/memory oder - mit PSI_SOURCE 'cgroup' - 'memory.pressure' der Brave-cgroup.
+    """
+    if not sys.platform.startswith('linux'):
+        raise OSError("PSI gibt es nur unter Linux")
+    path = '/proc/pressure/memory'
+    if config.get('PSI_SOURCE', 'system') == 'cgroup':
+        cgroup = get_brave_cgroup(config)
+        if cgroup:
+            path = os.path.join(cgroup.path, 'memory.pressure')
+        else:
+            logging.warning("⚠️ PSI_SOURCE 'cgroup' benötigt CGROUP_ENABLED. Verwende systemweiten Speicherdruck.")
+    # Fenster in Mikrosekunden; ohne Root-Rechte erlaubt der Kernel nur Vielfache von 2s.
+    window_us = int(config.get('PSI_WINDOW_SECONDS', 2) * 1_000_000)
+    threshold_us = int(config.get('PSI_STALL_THRESHOLD_MS', 150) * 1000)
+    trigger = f"{config.get('PSI_STALL_TYPE', 'some')} {threshold_us} {window_us}"
+    fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
     try:
-        proc.terminate()
-        proc.wait(timeout=2) # Gib dem Prozess 2 Sekunden Zeit, um auf terminate zu reagieren
-    except psutil.TimeoutExpired:
-        logging.warning(f"Prozess {proc.pid} hat nicht auf terminate reagiert. Erzwinge Beenden (kill)...")
-        proc.kill()
-    except (psutil.NoSuchProcess, psutil.AccessDenied):
-        pass # Prozess ist bereits weg oder Zugriff verweigert, alles ok.
+        os.write(fd, trigger.encode() + b'\0')
+    except OSError:
+        os.close(fd)
+        raise
+    logging.info(f"🧯 PSI-Trigger aktiv: {path} ({trigger})")
+    return fd
+
+
+def create_event_waiter(config):
+    """Baut den EventWaiter für die Hauptschleife und registriert die aktivierten Ereignisquellen."""
+    waiter = EventWaiter()
+    cgroup = get_brave_cgroup(config)
+    if cgroup:
+        def on_memory_event(fd, revents):
+            # Nur steigende 'high'/'max'/'oom'-Zähler sind für uns relevant.
+            changed = {key: value for key, value in cgroup.read_events(fd).items() if key in ('high', 'max', 'oom', 'oom_kill')}
+            return f"cgroup memory.events: {', '.join(f'{k}={v}' for k, v in changed.items())}" if changed else None
+        try:
+            waiter.register(cgroup.open_events(), 'cgroup', on_memory_event)
+        except OSError as e:
+            logging.warning(f"⚠️ memory.events kann nicht überwacht werden. Fehler: {e}")
+
+    if config.get('PSI_TRIGGER_ENABLED', False):
+        def on_pressure(fd, revents):
+            if revents & select.POLLERR:
+                # Die Quelle ist verschwunden (z.B. cgroup gelöscht); nicht weiter überwachen.
+                logging.warning("⚠️ PSI-Trigger wurde vom Kernel beendet.")
+                waiter.unregister(fd)
+                return None
+            return f"Speicherdruck (PSI) über {config.get('PSI_STALL_THRESHOLD_MS', 150)} ms pro {config.get('PSI_WINDOW_SECONDS', 2)}s"
+        try:
+            if not waiter.register(open_psi_trigger(config), 'psi', on_pressure):
+                logging.warning("⚠️ PSI-Trigger werden auf diesem System nicht unterstützt.")
+        except OSError as e:
+            logging.warning(f"⚠️ PSI-Trigger konnte nicht registriert werden (Linux ab 5.2 nötig). Fehler: {e}")
+    return waiter
+
+
 def get_status_emoji(percentage):
     """Gibt das passende Status-Emoji basierend auf der RAM-Nutzung zurück."""
     if percentage < 80:
@@ -383,26 +1788,1261 @@ def show_startup_info(brave_path, config):
         logging.info(f"📂 Brave-Pfad gefunden: {brave_path}")
     else:
         logging.warning("⚠️ Brave-Pfad nicht sofort gefunden. Es wird beim Neustart erneut gesucht.")
+    if config.get('LEAK_RECLAIM_PRIORITY', False) and not config.get('LEAK_DETECTION_ENABLED', False):
+        logging.warning("⚠️ LEAK_RECLAIM_PRIORITY benötigt LEAK_DETECTION_ENABLED. Es werden die größten Prozesse gewählt.")
 
-def monitor_and_restart(brave_path, config, have_pywin32):
-    """Überwacht den RAM-Verbrauch und startet bei Bedarf neu."""
-    processes, current_ram, profiles = get_brave_processes_and_memory_and_profiles(config)
-    
-    if not processes:
+class _GrowthState:
+    """Gewichtete Summen der Regression eines Prozesses; die Zeitachse ist stets auf die letzte Messung bezogen."""
+    __slots__ = ('first_time', 'last_time', 'samples', 'weight', 'sum_t', 'sum_y', 'sum_tt', 'sum_ty')
+
+    def __init__(self, now, rss_mb):
+        self.first_time = now
+        self.last_time = now
+        self.samples = 1
+        self.weight = 1.0
+        self.sum_t = 0.0
+        self.sum_y = rss_mb
+        self.sum_tt = 0.0
+        self.sum_ty = 0.0
+
+
+class LeakDetector:
+    """
+    Erkennt einzelne Prozesse mit stetig wachsendem Speicher (z.B. ein leckender Renderer).
+    Pro (pid, create_time) wird eine exponentiell gewichtete lineare Regression des RSS über der Zeit
+    inkrementell fortgeschrieben: feste Speichergröße pro Prozess, O(1) pro Messung, ohne Verlauf.
+    Beendete Prozesse werden beim nächsten Update aus der Tabelle entfernt. Die Steigung wird in
+    entry.growth (MB/min) abgelegt.
+    """
+
+    def __init__(self, config):
+        self.window = max(1.0, float(config.get('LEAK_WINDOW_SECONDS', 600)))
+        self.min_age = config.get('LEAK_MIN_AGE_SECONDS', 300)
+        self.threshold = config.get('LEAK_REPORT_MB_PER_MINUTE', 2)
+        self.top_k = config.get('LEAK_TOP_K', 5)
+        self.report_interval = config.get('LEAK_REPORT_INTERVAL_SECONDS', 300)
+        self._table = {}  # (pid, create_time) -> _GrowthState
+        self._last_report = float('-inf')
+
+    def __len__(self):
+        return len(self._table)
+
+    def update(self, entries, now):
+        """Nimmt die Messwerte eines Ticks auf und aktualisiert entry.growth aller übergebenen Prozesse."""
+        table = self._table
+        for entry in entries:
+            rss_mb = entry.rss / (1024 * 1024)
+            state = table.get(entry.key)
+            if state is None:
+                table[entry.key] = _GrowthState(now, rss_mb)
+                entry.growth = 0.0
+                continue
+            dt = now - state.last_time
+            if dt <= 0:
+                continue
+            # Nullpunkt der Zeitachse auf die neue Messung verschieben (bisherige Punkte liegen bei t - dt),
+            # dann alle Gewichte abklingen lassen und den neuen Punkt (t = 0) hinzufügen.
+            decay = math.exp(-dt / self.window)
+            sum_tt = state.sum_tt - 2 * dt * state.sum_t + dt * dt * state.weight
+            sum_t = state.sum_t - dt * state.weight
+            state.sum_ty = (state.sum_ty - dt * state.sum_y) * decay
+            state.sum_tt = sum_tt * decay
+            state.sum_t = sum_t * decay
+            state.sum_y = state.sum_y * decay + rss_mb
+            state.weight = state.weight * decay + 1.0
+            state.last_time = now
+            state.samples += 1
+
+            denominator = state.weight * state.sum_tt - state.sum_t * state.sum_t
+            if state.samples >= 3 and now - state.first_time >= self.min_age and denominator > 1e-9:
+                entry.growth = (state.weight * state.sum_ty - state.sum_t * state.sum_y) / denominator * 60
+            else:
+                entry.growth = 0.0
+        # Alle aktuellen Prozesse stehen in der Tabelle; mehr Einträge bedeuten beendete Prozesse.
+        if len(table) > len(entries):
+            for key in table.keys() - {entry.key for entry in entries}:
+                del table[key]
+        if now - self._last_report >= self.report_interval:
+            self.report(entries, now)
+
+    def top(self, entries):
+        """Gibt die top_k am schnellsten wachsenden Prozesse oberhalb der Schwelle zurück."""
+        suspects = [entry for entry in entries if entry.growth >= self.threshold]
+        suspects.sort(key=lambda entry: entry.growth, reverse=True)
+        return suspects[:self.top_k]
+
+    def report(self, entries, now):
+        suspects = self.top(entries)
+        if not suspects:
+            return
+        self._last_report = now
+        logging.warning(f"🕳️ Mögliche Speicherlecks ({len(suspects)} Prozess(e) wachsen um mehr als {self.threshold:g} MB/min):")
+        for entry in suspects:
+            cmdline = ' '.join(entry.cmdline)
+            logging.warning(f"  -> {entry.proc_type} (PID: {entry.pid}): {entry.rss / (1024 * 1024):,.0f} MB, {entry.growth:+,.1f} MB/min"
+                            + (f" | {cmdline[:160]}{'…' if len(cmdline) > 160 else ''}" if cmdline else ""))
+
+_LEAK_DETECTOR = None
+
+def get_leak_detector(config):
+    """Gibt den prozessweiten LeakDetector zurück (None, wenn LEAK_DETECTION_ENABLED aus ist)."""
+    global _LEAK_DETECTOR
+    if _LEAK_DETECTOR is None and config.get('LEAK_DETECTION_ENABLED', False):
+        _LEAK_DETECTOR = LeakDetector(config)
+    return _LEAK_DETECTOR
+
+
+class MonitorSample:
+    """
+    Ergebnis einer Messung: Zeitpunkt, verfolgte Brave-Prozesse und abgerechneter Gesamtverbrauch in MB.
+    timestamp ist die Wanduhrzeit (Verlauf, Trace); Trend und Leck-Erkennung rechnen mit monotonic,
+    damit eine verstellte Systemuhr keine Sprünge in der Steigung erzeugt.
+    """
+    __slots__ = ('timestamp', 'entries', 'total_mb', 'scan_seconds', 'monotonic', 'instances')
+
+    def __init__(self, timestamp, entries, total_mb, scan_seconds=0.0, monotonic=None, instances=None):
+        self.timestamp = timestamp
+        self.entries = entries
+        self.total_mb = total_mb
+        self.scan_seconds = scan_seconds
+        self.monotonic = timestamp if monotonic is None else monotonic
+        # Mit TARGETS/MULTI_INSTANCE_ENABLED: [(Ziel, Instanz, MB, Limit in MB, Prozesse)] für die Metriken
+        self.instances = instances
+
+def collect_sample(config):
+    """Führt eine Messung durch (blockierend)."""
+    start = time.perf_counter()
+    entries, total_mb = get_brave_process_entries_and_memory(config)
+    timestamp, monotonic = time.time(), time.monotonic()
+    leaks = get_leak_detector(config)
+    if leaks:
+        leaks.update(entries, monotonic)
+    return MonitorSample(timestamp, entries, total_mb, time.perf_counter() - start, monotonic)
+
+_LAST_PRESSURE_ACTION = {}  # Instanz-Label -> Zeitpunkt (monotonic) der letzten durch Speicherdruck ausgelösten Freigabe
+
+def evaluate_sample(sample, config, trend=None, pressure=False, label=None):
+    """
+    Loggt den Status einer Messung und entscheidet, ob Speicher freigegeben werden muss.
+    Mit pressure=True (vom Kernel gemeldeter Speicherdruck) wird auch unterhalb des Limits
+    gehandelt, sofern Brave mindestens PSI_RECLAIM_MIN_MB belegt. label kennzeichnet die Instanz im Log.
+    Gibt (handeln, Wartezeit bis zur nächsten Prüfung in Sekunden) zurück.
+    """
+    check_interval = config.get('CHECK_INTERVAL_SECONDS', 60)
+    current_ram = sample.total_mb
+
+    if not sample.entries:
         logging.info("🔍 Kein Brave-Prozess gefunden.")
-        return
+        if trend:
+            trend.reset()
+        return False, check_interval
     
     ram_limit = config['RAM_LIMIT_MB']
-    if ram_limit > 0:
-        ram_percentage = (current_ram / ram_limit) * 100
-        status = get_status_emoji(ram_percentage)
-        logging.info(f"{status} RAM-Nutzung: {current_ram:,.2f} MB / {ram_limit:,} MB ({ram_percentage:.1f}%)")
-        
-        if current_ram > ram_limit:
-            restart_brave(processes, config, have_pywin32)
-            start_brave(brave_path, profiles)
-            log_section("Wartezeit nach Neustart...", separator='normal')
-            time.sleep(config['RESTART_WAIT_SECONDS'])
+    if ram_limit <= 0:
+        return False, check_interval
+
+    ram_percentage = (current_ram / ram_limit) * 100
+    status = get_status_emoji(ram_percentage)
+    accounting = MemoryAccountant.resolve_mode(config).upper()
+    prefix = f"[{label}] " if label else ""
+    logging.info(f"{status} {prefix}RAM-Nutzung ({accounting}): {current_ram:,.2f} MB / {ram_limit:,} MB ({ram_percentage:.1f}%)")
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        breakdown = get_memory_by_type(sample.entries)
+        logging.debug("   Aufschlüsselung (RSS): " + ", ".join(f"{proc_type} {rss_mb:,.0f} MB ({count})" for proc_type, (rss_mb, count) in breakdown.items()))
+    
+    # Steigt der Verbrauch so schnell, dass das Limit vor der nächsten Prüfung erreicht wird,
+    # handeln wir schon jetzt statt erst nach der Überschreitung.
+    predicted_breach = False
+    if trend:
+        trend.update(current_ram, sample.monotonic)
+        time_to_limit = trend.seconds_until(ram_limit)
+        if time_to_limit != float('inf'):
+            logging.debug(f"   Trend: {trend.slope * 60:+,.1f} MB/min, Limit voraussichtlich in {time_to_limit:,.0f}s erreicht")
+        predicted_breach = (config.get('PREDICTIVE_RESTART_ENABLED', True)
+                            and ram_percentage >= config.get('PREDICTIVE_MIN_PERCENT', 90)
+                            and time_to_limit <= config.get('PREDICTIVE_HORIZON_SECONDS', 10))
+        if predicted_breach and current_ram <= ram_limit:
+            logging.warning(f"📈 RAM-Limit wird voraussichtlich in {time_to_limit:,.0f}s überschritten. Handle vorzeitig.")
+
+    pressure_breach = pressure and current_ram >= config.get('PSI_RECLAIM_MIN_MB', 1024)
+    if pressure_breach and current_ram <= ram_limit and not predicted_breach:
+        # Hält der Druck an (z.B. durch andere Programme), nicht in jedem PSI-Fenster erneut einen Renderer beenden.
+        now = time.monotonic()
+        since_last = now - _LAST_PRESSURE_ACTION.get(label, float('-inf'))
+        if since_last < config.get('PSI_COOLDOWN_SECONDS', 300):
+            logging.info(f"🧯 {prefix}Kernel meldet Speicherdruck; letzte Freigabe deswegen vor {since_last:,.0f}s. Warte PSI_COOLDOWN_SECONDS ab.")
+            pressure_breach = False
+        else:
+            logging.warning(f"🧯 {prefix}Kernel meldet Speicherdruck. Brave belegt {current_ram:,.0f} MB - gebe Speicher frei.")
+            _LAST_PRESSURE_ACTION[label] = now
+
+    act = current_ram > ram_limit or predicted_breach or pressure_breach
+    return act, trend.next_interval(ram_limit) if trend else check_interval
+
+_LAST_NO_SHUTDOWN_WARNING = {}  # Instanz-Label -> Zeitpunkt (monotonic) der letzten Warnung bei SHUTDOWN_STRATEGY 'none'
+NO_SHUTDOWN_WARNING_INTERVAL_SECONDS = 600  # Die Warnung erscheint höchstens so oft, sonst nur im Debug-Log
+
+def restart_allowed(config, label=None):
+    """Bei SHUTDOWN_STRATEGY 'none' wird nur gewarnt (höchstens alle 10 Minuten) und nichts beendet."""
+    if config.get('SHUTDOWN_STRATEGY', 'graceful') != 'none':
+        return True
+    prefix = f"[{label}] " if label else ""
+    now = time.monotonic()
+    last = _LAST_NO_SHUTDOWN_WARNING.get(label)
+    if last is None or now - last >= NO_SHUTDOWN_WARNING_INTERVAL_SECONDS:
+        _LAST_NO_SHUTDOWN_WARNING[label] = now
+        logging.warning(f"⚠️ {prefix}Limit überschritten, SHUTDOWN_STRATEGY ist 'none'. Es wird nichts beendet.")
+    else:
+        logging.debug(f"{prefix}Limit weiterhin überschritten (SHUTDOWN_STRATEGY 'none').")
+    return False
+
+def reclaim_and_restart(brave_path, entries, current_ram, config, have_pywin32):
+    """
+    Gibt Speicher frei (blockierend): zuerst gezielt die größten Renderer/Utility-Prozesse beenden,
+    nur wenn das nicht reicht, wird der komplette Browser neu gestartet.
+    Gibt True zurück, wenn Brave komplett neu gestartet wurde.
+    """
+    if config.get('TARGETED_RECLAIM_ENABLED', True):
+        entries, current_ram = reclaim_memory_targeted(entries, current_ram, config)
+        if current_ram <= config['RAM_LIMIT_MB']:
+            logging.info("✅ RAM-Limit nach gezieltem Beenden wieder eingehalten. Kein Neustart nötig.")
+            return False
+    processes = [entry.proc for entry in entries]
+    # Profile erst jetzt ermitteln, solange die Prozesse noch laufen.
+    instances = get_process_tracker(config).get_profiles()
+    restart_brave(processes, config, have_pywin32)
+    tracker = get_process_tracker(config)
+    # Jede Instanz (eigenes --user-data-dir) mit ihren eigenen Profilen neu starten.
+    for user_data_dir, profiles in instances:
+        scheduler = (LaunchScheduler(config, tracker, (tracker.targets[0], None, user_data_dir))
+                     if config.get('LAUNCH_SCHEDULER_ENABLED', True) else None)
+        start_brave(brave_path, profiles, get_brave_cgroup(config), user_data_dir, scheduler=scheduler)
+    return True
+
+class LiveExecutor:
+    """Führt Messung, Freigabe und Wartezeiten von monitor_and_restart im echten System aus."""
+    label = None
+
+    def collect(self, config):
+        return collect_sample(config)
+
+    def reclaim(self, brave_path, entries, current_ram, config, have_pywin32):
+        return reclaim_and_restart(brave_path, entries, current_ram, config, have_pywin32)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+_LIVE_EXECUTOR = LiveExecutor()
+
+def monitor_and_restart(brave_path, config, have_pywin32, trend=None, pressure=False, exporters=(), executor=None):
+    """
+    Überwacht den RAM-Verbrauch und startet bei Bedarf neu (eine Prüfung, blockierend).
+    Mit executor lassen sich Messung, Freigabe und Wartezeiten ersetzen (z.B. durch ReplayExecutor).
+    Gibt die Wartezeit in Sekunden bis zur nächsten Prüfung zurück.
+    """
+    executor = executor or _LIVE_EXECUTOR
+    sample = executor.collect(config)
+    for exporter in exporters:
+        try:
+            exporter(sample)
+        except Exception as e:
+            logging.error(f"❌ Fehler im Exporter: {e}", exc_info=True)
+    act, next_check = evaluate_sample(sample, config, trend, pressure, executor.label)
+    if not act or not restart_allowed(config, executor.label):
+        return next_check
+
+    restarted = executor.reclaim(brave_path, sample.entries, sample.total_mb, config, have_pywin32)
+    if trend:
+        trend.reset()
+    if not restarted or config.get('LAUNCH_SCHEDULER_ENABLED', True):
+        # Ohne Neustart bzw. mit LaunchScheduler (alle Profile sind bereits bereit) sofort weiter überwachen.
+        return trend.min_interval if trend else config.get('CHECK_INTERVAL_SECONDS', 60)
+    log_section("Wartezeit nach Neustart...", separator='normal')
+    executor.sleep(config['RESTART_WAIT_SECONDS'])
+    return config.get('CHECK_INTERVAL_SECONDS', 60)
+
+
+class BraveInstance:
+    """
+    Eine Instanz eines Ziels (bzw. alle Instanzen eines Benutzers oder Ziels) mit eigenem Limit, Trend
+    und Abrechnung. Dient monitor_and_restart als Executor: Messwerte stammen aus dem gemeinsamen
+    Durchlauf des MultiInstanceMonitor, Freigabe und Neustart betreffen nur die eigenen Prozesse.
+    """
+
+    def __init__(self, monitor, key):
+        self.monitor = monitor
+        self.key = key
+        target, user, user_data_dir = key
+        self.target = target
+        self.label = ' '.join(part for part in (None if target.default else target.name, user, user_data_dir) if part) or target.name
+        config = target.config
+        limits = config.get('INSTANCE_RAM_LIMITS_MB') or {}
+        # Reihenfolge: user-data-dir, voller Benutzername, Benutzername ohne Domäne (Windows: DOMÄNE\name).
+        short_user = user.rsplit('\\', 1)[-1] if user else None
+        limit = next((limits[name] for name in (user_data_dir, user, short_user) if name in limits), config['RAM_LIMIT_MB'])
+        self.config = {**config, 'RAM_LIMIT_MB': limit}
+        self.trend = MemoryTrend(self.config)
+        self.accountant = MemoryAccountant(self.config)
+        self.entries = []
+        self.total_mb = 0.0
+        self.timestamp = 0.0
+        self.monotonic = 0.0
+        self.cooldown_until = 0.0
+        self.launching = None  # Thread des LaunchScheduler, solange Profile gestartet werden
+
+    def is_busy(self):
+        """True während der Wartezeit nach einem Neustart bzw. solange die Profile noch starten."""
+        return time.monotonic() < self.cooldown_until or (self.launching is not None and self.launching.is_alive())
+
+    def update(self, entries, timestamp, monotonic):
+        self.entries = entries
+        self.timestamp = timestamp
+        self.monotonic = monotonic
+        self.total_mb = self.accountant.total_bytes(entries) / (1024 * 1024)
+
+    def collect(self, config):
+        return MonitorSample(self.timestamp, self.entries, self.total_mb, monotonic=self.monotonic)
+
+    def reclaim(self, brave_path, entries, current_ram, config, have_pywin32):
+        if config.get('TARGETED_RECLAIM_ENABLED', True):
+            entries, current_ram = reclaim_memory_targeted(entries, current_ram, config, measure=lambda: self.monitor.rescan(self.key))
+            if current_ram <= config['RAM_LIMIT_MB']:
+                logging.info(f"✅ [{self.label}] RAM-Limit nach gezieltem Beenden wieder eingehalten. Kein Neustart nötig.")
+                return False
+        # Je Hauptprozess festhalten, wie er neu gestartet wird, solange die Prozesse noch laufen.
+        launches = []
+        for (_, user, user_data_dir), group in self.monitor.tracker.group_instances(entries).items():
+            main = next((entry for entry in group if entry.proc_type == 'browser'), None)
+            executable = (config.get('EXECUTABLE_PATH') or (main.cmdline[0] if main and main.cmdline else None)
+                          or (brave_path if self.target.default else None))
+            launches.append((executable, find_active_brave_profiles(group), (self.target, user, user_data_dir),
+                             capture_launch_identity(main) if main else None))
+        restart_brave([entry.proc for entry in entries], config, have_pywin32, scoped=True)
+        scheduled = config.get('LAUNCH_SCHEDULER_ENABLED', True)
+        if scheduled:
+            # Die übrigen Instanzen werden weiter überwacht, während diese ihre Profile startet.
+            self.launching = threading.Thread(target=self._relaunch, args=(launches, config, scheduled), name=f'brave-launch-{self.label}', daemon=True)
+            self.launching.start()
+        else:
+            self._relaunch(launches, config, scheduled)
+        return True
+
+    def _relaunch(self, launches, config, scheduled):
+        for executable, profiles, instance, launch_as in launches:
+            if executable or self.target.default:
+                scheduler = LaunchScheduler(config, self.monitor.tracker, instance) if scheduled else None
+                start_brave(executable, profiles, None, instance[2], launch_as, scheduler)
+            else:
+                logging.warning(f"⚠️ [{self.label}] Kein Programmpfad bekannt (EXECUTABLE_PATH). Manueller Neustart erforderlich.")
+
+    def sleep(self, seconds):
+        # Nicht blockieren: Die übrigen Instanzen werden währenddessen weiter überwacht.
+        self.cooldown_until = time.monotonic() + seconds
+
+
+class MultiInstanceMonitor:
+    """
+    Überwacht mehrere Ziele (TARGETS) und/oder die Instanzen mehrerer Benutzer (MULTI_INSTANCE_ENABLED):
+    Ein einziger Durchlauf über die Prozesstabelle pro Tick, danach Gruppierung nach (Ziel, Benutzer,
+    user-data-dir) und Prüfung jeder Gruppe gegen ihr eigenes Limit. Die Kosten bleiben unabhängig von
+    der Anzahl der Ziele und Sitzungen bei einem Durchlauf.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.scope = config.get('INSTANCE_SCOPE', 'instance')
+        if self.scope not in ('instance', 'user'):
+            logging.warning(f"Unbekannter INSTANCE_SCOPE-Wert '{self.scope}'. Verwende 'instance'.")
+            self.scope = 'instance'
+        per_user = config.get('MULTI_INSTANCE_ENABLED', False)
+        if not per_user:
+            self.scope = 'target'
+        self.tracker = get_process_tracker(config)
+        self.instances = {}  # (Ziel, Benutzer, user-data-dir) -> BraveInstance
+        for target in self.tracker.targets:
+            if not target.default:
+                logging.info(f"🎯 Ziel '{target.name}': Prozessname '{target.process_name}', Limit {target.config['RAM_LIMIT_MB']:,} MB, Beenden: {target.config.get('SHUTDOWN_STRATEGY', 'graceful')}")
+        if per_user and not (check_admin_rights() if IS_WINDOWS else os.geteuid() == 0):
+            logging.warning("⚠️ Systemweiter Modus ohne Admin-/root-Rechte: Instanzen anderer Benutzer können weder beendet noch als dieser Benutzer neu gestartet werden.")
+
+    def rescan(self, key):
+        """Misst erneut (nach gezieltem Beenden) und gibt (Prozesse, MB) der Instanz key zurück."""
+        entries = self.tracker.group_instances(self.tracker.refresh(), self.scope).get(key, [])
+        instance = self.instances[key]
+        instance.update(entries, time.time(), time.monotonic())
+        return entries, instance.total_mb
+
+    def check(self, brave_path, have_pywin32, pressure=False, exporters=()):
+        """Eine Prüfung aller Instanzen (blockierend). Gibt die Wartezeit bis zur nächsten Prüfung zurück."""
+        start = time.perf_counter()
+        entries = self.tracker.refresh()
+        groups = self.tracker.group_instances(entries, self.scope)
+        timestamp, monotonic = time.time(), time.monotonic()
+        leaks = get_leak_detector(self.config)
+        if leaks:
+            leaks.update(entries, monotonic)
+        for key, group in groups.items():
+            instance = self.instances.get(key)
+            if instance is None:
+                instance = self.instances[key] = BraveInstance(self, key)
+                logging.info(f"👤 Neue Instanz: {instance.label} (Limit {instance.config['RAM_LIMIT_MB']:,} MB)")
+            instance.update(group, timestamp, monotonic)
+        sample = MonitorSample(timestamp, entries, sum(self.instances[key].total_mb for key in groups), time.perf_counter() - start, monotonic,
+                               [(instance.target.name, instance.label, instance.total_mb, instance.config['RAM_LIMIT_MB'], instance.entries)
+                                for instance in (self.instances[key] for key in groups)])
+        for exporter in exporters:
+            try:
+                exporter(sample)
+            except Exception as e:
+                logging.error(f"❌ Fehler im Exporter: {e}", exc_info=True)
+
+        now = time.monotonic()
+        next_check = self.config.get('CHECK_INTERVAL_SECONDS', 60)
+        if not groups:
+            logging.info("🔍 Kein Brave-Prozess gefunden.")
+        for key in groups:
+            instance = self.instances[key]
+            if instance.is_busy():
+                # Frisch neu gestartet: erst nach der Wartezeit bzw. wenn alle Profile bereit sind wieder bewerten.
+                next_check = min(next_check, max(instance.cooldown_until - now, self.config.get('LAUNCH_POLL_SECONDS', 0.5)))
+                continue
+            next_check = min(next_check, monitor_and_restart(brave_path, instance.config, have_pywin32, instance.trend, pressure, executor=instance))
+        for key in [key for key, instance in self.instances.items() if key not in groups and not instance.is_busy()]:
+            del self.instances[key]
+        return max(next_check, self.config.get('MIN_CHECK_INTERVAL_SECONDS', 1))
+
+
+class DaemonState:
+    """Gemeinsamer Zustand der Tasks des asynchronen Daemons (nur im Event-Loop-Thread verändert)."""
+
+    def __init__(self, config):
+        self.next_interval = config.get('CHECK_INTERVAL_SECONDS', 60)
+        self.pressure = False
+        self.restart_active = False
+        self.wake = asyncio.Event()  # Weckt den Sampler vorzeitig (Kernel-Ereignis, Neustart beendet)
+
+    def on_kernel_events(self, events):
+        for _, reason in events:
+            logging.info(f"⚡ Ereignis: {reason}. Prüfe sofort.")
+        self.pressure = self.pressure or any(kind == 'psi' for kind, _ in events)
+        self.wake.set()
+
+
+async def run_async_daemon(brave_path, config, have_pywin32, exporters=()):
+    """
+    Asynchroner Daemon aus nebenläufigen Tasks: Sampler, Entscheider, Neustart-Ausführung und Exporter.
+    Blockierende psutil- und subprocess-Aufrufe laufen in einem Thread-Pool, sodass Messungen und
+    Exporte auch während eines Neustarts weiterlaufen.
+    """
+    loop = asyncio.get_running_loop()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.get('ASYNC_WORKER_THREADS', 4), thread_name_prefix='brave-monitor')
+    # Exporter laufen nacheinander in einem eigenen Thread; beim Beenden wird nur auf den laufenden Export gewartet,
+    # damit die Dateien danach sicher geschlossen werden können.
+    export_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='brave-monitor-export')
+    state = DaemonState(config)
+    trend = MemoryTrend(config)
+    decider_queue = asyncio.Queue()
+    restart_queue = asyncio.Queue(maxsize=1)
+    exporter_queue = asyncio.Queue(maxsize=config.get('EXPORTER_QUEUE_SIZE', 100))
+
+    def run_blocking(func, *args):
+        return loop.run_in_executor(executor, func, *args)
+
+    # Kernel-Ereignisse (cgroup, PSI) blockieren in poll(); dafür läuft ein eigener Daemon-Thread,
+    # der den Event-Loop benachrichtigt und beim Programmende nicht abgewartet werden muss.
+    waiter = create_event_waiter(config)
+    if waiter.has_sources():
+        def watch_kernel_events():
+            while True:
+                events = waiter.wait(3600)
+                if events:
+                    loop.call_soon_threadsafe(state.on_kernel_events, events)
+        threading.Thread(target=watch_kernel_events, name='brave-monitor-events', daemon=True).start()
+
+    async def sampler():
+        while True:
+            try:
+                sample = await run_blocking(collect_sample, config)
+            except Exception as e:
+                logging.critical(f"❌ Unerwarteter Fehler bei der Messung: {e}", exc_info=True)
+                await asyncio.sleep(10)
+                continue
+            await decider_queue.put(sample)
+            if exporter_queue.full():
+                # Ein langsamer Exporter darf die Messung nicht aufhalten; älteste Messung verwerfen.
+                exporter_queue.get_nowait()
+                exporter_queue.task_done()
+            exporter_queue.put_nowait(sample)
+            # Warten, bis der Entscheider das nächste Intervall festgelegt hat.
+            await decider_queue.join()
+            logging.debug(f"Nächste Prüfung in {state.next_interval:.1f}s.")
+            try:
+                await asyncio.wait_for(state.wake.wait(), timeout=state.next_interval)
+            except asyncio.TimeoutError:
+                pass
+            state.wake.clear()
+
+    async def decider():
+        while True:
+            sample = await decider_queue.get()
+            try:
+                pressure, state.pressure = state.pressure, False
+                act, state.next_interval = evaluate_sample(sample, config, trend, pressure)
+                if act and state.restart_active:
+                    # Die laufende Maßnahme betrifft dieselben Prozesse. Nach ihrem Abschluss wird
+                    # sofort neu gemessen und erneut entschieden.
+                    logging.info("⏳ Freigabe läuft bereits. Erneute Überschreitung wird danach neu bewertet.")
+                elif act and restart_allowed(config):
+                    state.restart_active = True
+                    restart_queue.put_nowait(sample)
+            except Exception as e:
+                logging.critical(f"❌ Unerwarteter Fehler im Entscheider: {e}", exc_info=True)
+            finally:
+                decider_queue.task_done()
+
+    async def restart_executor():
+        while True:
+            sample = await restart_queue.get()
+            try:
+                restarted = await run_blocking(reclaim_and_restart, brave_path, sample.entries, sample.total_mb, config, have_pywin32)
+                if restarted and not config.get('LAUNCH_SCHEDULER_ENABLED', True):
+                    log_section("Wartezeit nach Neustart (Überwachung läuft weiter)...", separator='normal')
+                    await asyncio.sleep(config['RESTART_WAIT_SECONDS'])
+            except Exception as e:
+                logging.critical(f"❌ Unerwarteter Fehler beim Neustart: {e}", exc_info=True)
+            finally:
+                trend.reset()
+                state.restart_active = False
+                state.next_interval = trend.min_interval
+                state.wake.set()
+
+    async def exporter_task():
+        while True:
+            sample = await exporter_queue.get()
+            try:
+                for exporter in exporters:
+                    await loop.run_in_executor(export_executor, exporter, sample)
+            except Exception as e:
+                logging.error(f"❌ Fehler im Exporter: {e}", exc_info=True)
+            finally:
+                exporter_queue.task_done()
+
+    tasks = [asyncio.create_task(coro(), name=coro.__name__) for coro in (sampler, decider, restart_executor, exporter_task)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        export_executor.shutdown(wait=True, cancel_futures=True)
+
+class HistoryRing:
+    """
+    Kompakter Ringpuffer für Messwerte in einer Binärdatei fester Größe (per mmap eingeblendet).
+    Jeder Datensatz belegt RECORD.size Bytes: Zeitstempel, Gesamtverbrauch, Prozessanzahl und
+    der RSS-Verbrauch der wichtigsten Prozesstypen in MB. Ist der Ring voll, werden die ältesten
+    Datensätze überschrieben.
+    """
+    MAGIC = b'BRMH'
+    VERSION = 2
+    HEADER = struct.Struct('<4sHHIQ')  # Magic, Version, Datensatzgröße, Kapazität, Anzahl geschriebener Datensätze
+    HEADER_SIZE = 32
+    RECORD = struct.Struct('<IIHIIII')  # Zeit, Gesamt-MB, Prozesse, browser, renderer, gpu-process, utility
+    TYPE_COLUMNS = ('browser', 'renderer', 'gpu-process', 'utility')
+    FIELDS = ('total', 'processes') + TYPE_COLUMNS
+
+    def __init__(self, path, capacity=None):
+        """Öffnet die Datei. Mit capacity wird sie bei Bedarf (neu) angelegt, ohne nur gelesen."""
+        self.path = path
+        writable = capacity is not None
+        if writable and not self._has_valid_header(path, capacity):
+            logging.info(f"Lege Verlaufsdatei '{path}' an ({capacity:,} Datensätze, {(self.HEADER_SIZE + capacity * self.RECORD.size) / (1024 * 1024):,.1f} MB).")
+            with open(path, 'wb') as f:
+                f.truncate(self.HEADER_SIZE + capacity * self.RECORD.size)
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.RECORD.size, capacity, 0))
+        self._file = open(path, 'r+b' if writable else 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, version, record_size, self.capacity, self.written = self.HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC or version != self.VERSION or record_size != self.RECORD.size:
+            self.close()
+            raise ValueError(f"'{path}' ist keine gültige Verlaufsdatei.")
+
+    @classmethod
+    def _has_valid_header(cls, path, capacity):
+        try:
+            with open(path, 'rb') as f:
+                magic, version, record_size, file_capacity, _ = cls.HEADER.unpack(f.read(cls.HEADER.size))
+        except (OSError, struct.error):
+            return False
+        if (magic, version, record_size) != (cls.MAGIC, cls.VERSION, cls.RECORD.size):
+            return False
+        if file_capacity != capacity:
+            logging.warning(f"Kapazität der Verlaufsdatei geändert ({file_capacity:,} -> {capacity:,}). Verlauf wird neu angelegt.")
+            return False
+        return True
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def _offset(self, index):
+        """Dateiposition des index-ten Datensatzes in zeitlicher Reihenfolge (0 = ältester)."""
+        start = self.written - len(self)
+        return self.HEADER_SIZE + ((start + index) % self.capacity) * self.RECORD.size
+
+    def append(self, sample):
+        """Schreibt eine Messung (MonitorSample) als neuen Datensatz."""
+        breakdown = get_memory_by_type(sample.entries)
+        columns = [breakdown.get(proc_type, (0, 0))[0] for proc_type in self.TYPE_COLUMNS]
+        timestamp = int(sample.timestamp)
+        if self.written:
+            # Springt die Systemuhr zurück (NTP, Ruhezustand), bleibt der Ring trotzdem zeitlich sortiert,
+            # sonst findet die Binärsuche in values() die Fenstergrenzen nicht mehr.
+            timestamp = max(timestamp, self.timestamp_at(len(self) - 1))
+        self.RECORD.pack_into(self._mm, self.HEADER_SIZE + (self.written % self.capacity) * self.RECORD.size,
+                              timestamp, _clamp_u32(sample.total_mb), _clamp_u16(len(sample.entries)), *map(_clamp_u32, columns))
+        self.written += 1
+        self.HEADER.pack_into(self._mm, 0, self.MAGIC, self.VERSION, self.RECORD.size, self.capacity, self.written)
+
+    def timestamp_at(self, index):
+        return struct.unpack_from('<I', self._mm, self._offset(index))[0]
+
+    def values(self, field, since=None, until=None):
+        """Gibt die Werte eines Feldes im Zeitfenster [since, until] als array('f') zurück."""
+        column = self.FIELDS.index(field) + 1
+        # Die Datensätze sind zeitlich sortiert; Fenstergrenzen per Binärsuche finden.
+        timestamps = _IndexedView(len(self), self.timestamp_at)
+        first = bisect.bisect_left(timestamps, since) if since is not None else 0
+        last = bisect.bisect_right(timestamps, until) if until is not None else len(self)
+        result = array.array('f')
+        for index in range(first, last):
+            result.append(self.RECORD.unpack_from(self._mm, self._offset(index))[column])
+        return result
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+
+class _IndexedView:
+    """Minimale Sequenz über eine Zugriffsfunktion, damit bisect ohne Kopie der Daten arbeiten kann."""
+
+    def __init__(self, length, getter):
+        self._length = length
+        self._getter = getter
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        return self._getter(index)
+
+
+def _clamp_u16(value):
+    return max(0, min(0xFFFF, int(round(value))))
+
+def _clamp_u32(value):
+    return max(0, min(0xFFFFFFFF, int(round(value))))
+
+def percentile(sorted_values, fraction):
+    """Perzentil (lineare Interpolation) einer bereits sortierten Sequenz."""
+    if not sorted_values:
+        return float('nan')
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def parse_duration(text):
+    """Wandelt Angaben wie '90s', '15m', '6h' oder '7d' in Sekunden um."""
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+def query_history(args):
+    """Wertet die Verlaufsdatei für ein Zeitfenster aus (Unterbefehl 'history')."""
+    try:
+        ring = HistoryRing(args.path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Verlaufsdatei kann nicht gelesen werden: {e}")
+        return 1
+    try:
+        until = time.time()
+        if len(ring):
+            # Nach einem Rücksprung der Uhr liegen die jüngsten Datensätze evtl. "in der Zukunft".
+            until = max(until, ring.timestamp_at(len(ring) - 1))
+        since = until - parse_duration(args.since)
+        values = sorted(ring.values(args.field, since, until))
+    finally:
+        ring.close()
+    if not values:
+        print(f"Keine Messwerte für '{args.field}' in den letzten {args.since}.")
+        return 0
+    print(f"📈 {args.field} über die letzten {args.since} ({len(values):,} Messwerte):")
+    print(f"   min {values[0]:,.0f} | max {values[-1]:,.0f} | mittel {sum(values) / len(values):,.0f}")
+    print("   " + " | ".join(f"p{int(p * 100)} {percentile(values, p):,.0f}" for p in (0.5, 0.9, 0.95, 0.99)))
+    return 0
+
+
+_SyntheticMemInfo = collections.namedtuple('_SyntheticMemInfo', 'rss vms')
+_SyntheticOpenFile = collections.namedtuple('_SyntheticOpenFile', 'path fd')
+
+
+class SyntheticProcess:
+    """Nachbildung eines psutil.Process für Benchmarks, ohne echten Prozess dahinter."""
+
+    def __init__(self, source, pid, name, cmdline, rss, ppid=1, open_files=(), growth=0.0, user='bench'):
+        self._source = source
+        self.pid = pid
+        self._name = name
+        self._user = user
+        self._cmdline = cmdline
+        self._create_time = source.clock
+        self._ppid = ppid
+        self._open_files = [_SyntheticOpenFile(path, fd) for fd, path in enumerate(open_files, start=3)]
+        self.rss = rss
+        self.growth = growth  # Bytes pro Tick (Leck), zusätzlich zum Rauschen
+        self.alive = True
+
+    def _check(self):
+        if not self.alive:
+            raise psutil.NoSuchProcess(self.pid)
+
+    def name(self):
+        self._check()
+        return self._name
+
+    def cmdline(self):
+        self._check()
+        return list(self._cmdline)
+
+    def create_time(self):
+        return self._create_time
+
+    def ppid(self):
+        self._check()
+        return self._ppid
+
+    def username(self):
+        self._check()
+        return self._user
+
+    def environ(self):
+        self._check()
+        return {}
+
+    def status(self):
+        self._check()
+        return psutil.STATUS_SLEEPING
+
+    def is_running(self):
+        return self.alive
+
+    def memory_info(self):
+        self._check()
+        return _SyntheticMemInfo(int(self.rss), int(self.rss * 2))
+
+    def open_files(self):
+        self._check()
+        return list(self._open_files)
+
+    def terminate(self):
+        self._check()
+        self._source.remove(self.pid)
+
+    kill = terminate
+
+    def wait(self, timeout=None):
+        if self.alive:
+            raise psutil.TimeoutExpired(timeout, self.pid)
+        return 0
+
+
+class SyntheticProcessSource:
+    """
+    Künstliche Prozesstabelle mit N Fremdprozessen und M Brave-Prozessen samt realistischer
+    Kommandozeilen, geöffneter Profildateien und Speicherverläufen. Mit tick() ändern sich die
+    Speicherwerte, und ein Teil der Fremdprozesse wird durch neue PIDs ersetzt.
+    """
+    HOST_NAMES = ('bash', 'python3', 'sshd', 'systemd', 'chrome', 'code', 'node', 'java', 'svchost', 'conhost')
+
+    def __init__(self, host_count, brave_count, seed=0, churn=0.01, leak_fraction=0.05, profiles=2):
+        self.random = random.Random(seed)
+        self.clock = 1_000_000.0
+        self.churn = churn
+        self._processes = {}
+        self._next_pid = 1000
+        self._host_pids = []
+        if IS_WINDOWS:
+            self.brave_exe = r"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe"
+            self.brave_name = 'brave.exe'
+            user_data = os.path.join(os.environ.get('LOCALAPPDATA', r'C:\Users\bench\AppData\Local'), 'BraveSoftware', 'Brave-Browser', 'User Data')
+        else:
+            self.brave_exe = '/opt/brave.com/brave/brave'
+            self.brave_name = 'brave'
+            user_data = os.path.expanduser('~/.config/BraveSoftware/Brave-Browser')
+
+        for _ in range(host_count):
+            self._spawn_host()
+
+        brave_count = max(1, brave_count)
+        profile_names = ['Default'] + [f'Profile {i}' for i in range(1, profiles)]
+        main_pids = []
+        for profile in profile_names[:brave_count]:
+            files = [os.path.join(user_data, profile, name) for name in ('History', 'Cookies', 'Preferences')]
+            main_pids.append(self._add(self.brave_name, [self.brave_exe, f'--profile-directory={profile}'], 250, files=files))
+        types = ['gpu-process', 'utility', 'utility', 'zygote'] + ['renderer'] * max(0, brave_count)
+        for i in range(brave_count - len(main_pids)):
+            proc_type = types[i % len(types)]
+            cmdline = [self.brave_exe, f'--type={proc_type}', '--lang=de', '--enable-features=PartitionAllocBackupRefPtr',
+                       f'--renderer-client-id={i + 5}', f'--field-trial-handle={self.random.getrandbits(32)}']
+            if proc_type == 'utility':
+                cmdline.insert(2, '--utility-sub-type=network.mojom.NetworkService')
+            growth = self.random.uniform(0.5, 5) * 1024 * 1024 if proc_type == 'renderer' and self.random.random() < leak_fraction else 0.0
+            self._add(self.brave_name, cmdline, self.random.uniform(30, 400), ppid=main_pids[i % len(main_pids)], growth=growth)
+        # Hilfsprozess mit ähnlichem Namen, wie ihn Brave neben dem Browser startet.
+        self._add('brave_crashpad_handler', [self.brave_exe.replace('brave', 'brave_crashpad_handler'), '--database=/tmp'], 5)
+
+    def _add(self, name, cmdline, rss_mb, ppid=1, files=(), growth=0.0, user='bench'):
+        pid = self._next_pid
+        self._next_pid += self.random.randint(1, 4)
+        self._processes[pid] = SyntheticProcess(self, pid, name, cmdline, rss_mb * 1024 * 1024, ppid, files, growth, user)
+        return pid
+
+    def _spawn_host(self):
+        name = self.random.choice(self.HOST_NAMES)
+        self._host_pids.append(self._add(name, [f'/usr/bin/{name}', '--flag'], self.random.uniform(1, 200)))
+
+    def remove(self, pid):
+        """Beendet einen Prozess; wie bei Brave enden die Kindprozesse mit dem Hauptprozess."""
+        proc = self._processes.pop(pid, None)
+        if proc:
+            proc.alive = False
+            for child in [p for p in self._processes.values() if p._ppid == pid]:
+                self.remove(child.pid)
+
+    def brave_processes(self):
+        return [proc for proc in self._processes.values() if proc._name == self.brave_name]
+
+    def tick(self, seconds=1.0):
+        """Schreitet die Simulation voran: Speicher ändert sich, Fremdprozesse kommen und gehen."""
+        self.clock += seconds
+        for proc in self.brave_processes():
+            proc.rss = max(10 * 1024 * 1024, proc.rss + proc.growth + self.random.gauss(0, 512 * 1024))
+        for _ in range(int(len(self._host_pids) * self.churn)):
+            self.remove(self._host_pids.pop(self.random.randrange(len(self._host_pids))))
+            self._spawn_host()
+
+    def pids(self):
+        return list(self._processes)
+
+    def process(self, pid):
+        try:
+            return self._processes[pid]
+        except KeyError:
+            raise psutil.NoSuchProcess(pid) from None
+
+    def create_sampler(self, config):
+        return PsutilMemorySampler()
+
+
+def _measure_ticks(tracker, source, ticks):
+    """Misst Latenz und CPU-Zeit pro Tick (tracker.refresh + Abrechnung) in Sekunden."""
+    latencies = []
+    cpu_time = 0.0
+    for _ in range(ticks):
+        source.tick()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        entries = tracker.refresh()
+        tracker.accountant.total_bytes(entries)
+        latencies.append(time.perf_counter() - start)
+        cpu_time += time.process_time() - cpu_start
+    return sorted(latencies), cpu_time / ticks
+
+def run_benchmark(args):
+    """Misst die Skalierung von Messung, Profilerkennung und Neustart mit synthetischen Prozessen (Unterbefehl 'bench')."""
+    config = {**load_or_create_config(create=False), 'MEMORY_SAMPLER': 'psutil', 'MEMORY_ACCOUNTING': 'rss',
+              'GRACEFUL_SHUTDOWN_WAIT_SECONDS': 1}
+    host_counts = [int(value) for value in args.hosts.split(',')]
+    results = []
+    print(f"{'Prozesse':>9} {'Brave':>6} {'Kaltstart':>10} {'Tick p50':>10} {'Tick p95':>10} {'CPU/Tick':>10} {'Alloc/Tick':>11} {'Profile':>9} {'Neustart':>9}")
+    for host_count in host_counts:
+        source = SyntheticProcessSource(host_count, args.brave, seed=args.seed, churn=args.churn)
+        tracker = BraveProcessTracker(config, source)
+
+        start = time.perf_counter()
+        tracker.refresh()
+        cold = time.perf_counter() - start
+
+        latencies, cpu_per_tick = _measure_ticks(tracker, source, args.ticks)
+
+        tracemalloc.start()
+        alloc_peaks = []
+        for _ in range(max(1, args.ticks // 5)):
+            source.tick()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            entries = tracker.refresh()
+            tracker.accountant.total_bytes(entries)
+            alloc_peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        tracker.get_profiles()
+        profile_time = time.perf_counter() - start
+
+        restart_time = float('nan')
+        if not IS_WINDOWS:
+            # Unter Windows würde restart_brave echte taskkill-Befehle absetzen; dort nur Messung und Profile.
+            processes = [entry.proc for entry in tracker.refresh()]
+            previous_level = logging.getLogger().level
+            logging.getLogger().setLevel(logging.ERROR)
+            try:
+                start = time.perf_counter()
+                restart_brave(processes, config, False)
+                restart_time = time.perf_counter() - start
+            finally:
+                logging.getLogger().setLevel(previous_level)
+
+        result = {
+            'host_processes': host_count, 'brave_processes': args.brave, 'cold_scan_ms': cold * 1000,
+            'tick_p50_ms': percentile(latencies, 0.5) * 1000, 'tick_p95_ms': percentile(latencies, 0.95) * 1000,
+            'cpu_per_tick_ms': cpu_per_tick * 1000, 'alloc_peak_kib_per_tick': max(alloc_peaks) / 1024,
+            'profiles_ms': profile_time * 1000, 'restart_ms': restart_time * 1000,
+        }
+        results.append(result)
+        print(f"{host_count:>9,} {args.brave:>6} {result['cold_scan_ms']:>8.2f}ms {result['tick_p50_ms']:>8.3f}ms {result['tick_p95_ms']:>8.3f}ms "
+              f"{result['cpu_per_tick_ms']:>8.3f}ms {result['alloc_peak_kib_per_tick']:>8.1f}KiB {result['profiles_ms']:>7.3f}ms {result['restart_ms']:>7.2f}ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.max_tick_ms is not None:
+        slow = [r for r in results if r['tick_p95_ms'] > args.max_tick_ms]
+        if slow:
+            print(f"❌ Tick-Latenz (p95) über {args.max_tick_ms} ms bei {', '.join(str(r['host_processes']) for r in slow)} Prozessen.")
+            return 1
+    return 0
+
+
+class TraceRecorder:
+    """
+    Zeichnet jede Messung als Zeile in einer Trace-Datei auf (Endung .gz: gzip-komprimiert):
+    Zeitstempel, Gesamtverbrauch in MB und als JSON die Prozesse mit [PID, Startzeit, Typ, RSS in Bytes].
+    Jeder Lauf schreibt eine eigene Datei; close() schließt den gzip-Strom sauber ab.
+    """
+    FLUSH_EVERY = 60  # Zeilen; gzip komprimiert in größeren Blöcken besser
+
+    def __init__(self, path):
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf-8') if path.endswith('.gz') else open(path, 'w', encoding='utf-8')
+        self._pending = 0
+
+    @staticmethod
+    def run_path(path, when=None):
+        """Dateiname für einen Lauf: 'brave_ram_trace.tsv.gz' -> 'brave_ram_trace-20240131-235959.tsv.gz'."""
+        directory, name = os.path.split(path)
+        stem, dot, extension = name.partition('.')
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(when))
+        return os.path.join(directory, f"{stem}-{stamp}{dot}{extension}")
+
+    def append(self, sample):
+        processes = json.dumps([[e.pid, e.create_time, e.proc_type, e.rss] for e in sample.entries], separators=(',', ':'))
+        self._file.write(f"{sample.timestamp:.3f}\t{sample.total_mb:.2f}\t{processes}\n")
+        self._pending += 1
+        if self._pending >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._pending = 0
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class ReplayedProcess:
+    """Prozess aus einer Trace-Datei; bietet dieselben Felder wie TrackedProcess, aber kein psutil-Objekt."""
+    __slots__ = ('proc', 'pid', 'create_time', 'name', 'cmdline', 'proc_type', 'rss', 'ppid', 'user', 'instance', 'target', 'growth')
+
+    def __init__(self, pid, create_time, proc_type, rss):
+        self.proc = None
+        self.pid = pid
+        self.create_time = create_time
+        self.name = ''
+        self.cmdline = []
+        self.proc_type = proc_type
+        self.rss = rss
+        self.ppid = 0
+        self.user = None
+        self.instance = None
+        self.target = None
+        self.growth = 0.0
+
+    @property
+    def key(self):
+        return (self.pid, self.create_time)
+
+
+class _TraceRecord:
+    """Eine Zeile der Trace-Datei. Die Prozessliste wird erst bei Bedarf (bei einer Prüfung) dekodiert."""
+    __slots__ = ('timestamp', 'total_mb', '_raw', '_processes')
+
+    def __init__(self, timestamp, total_mb, raw):
+        self.timestamp = timestamp
+        self.total_mb = total_mb
+        self._raw = raw
+        self._processes = None
+
+    def processes(self):
+        if self._processes is None:
+            self._processes = json.loads(self._raw)
+        return self._processes
+
+def read_trace(path):
+    """Liest eine Trace-Datei zeilenweise (konstanter Speicherbedarf) und liefert _TraceRecord-Objekte in zeitlicher Reihenfolge."""
+    last_timestamp = float('-inf')
+    records = 0
+    with (gzip.open(path, 'rt', encoding='utf-8') if path.endswith('.gz') else open(path, 'r', encoding='utf-8')) as f:
+        try:
+            for line in f:
+                try:
+                    timestamp, total_mb, raw = line.rstrip('\n').split('\t', 2)
+                    record = _TraceRecord(float(timestamp), float(total_mb), raw)
+                except ValueError:
+                    continue
+                if record.timestamp <= last_timestamp:
+                    continue
+                last_timestamp = record.timestamp
+                records += 1
+                yield record
+        except EOFError:
+            # Beim Beenden des Monitors abgeschnittener gzip-Block; alles davor ist gültig.
+            logging.warning(f"⚠️ Trace-Datei '{path}' endet unvollständig. Rest wird ignoriert.")
+        except (zlib.error, gzip.BadGzipFile, UnicodeDecodeError) as e:
+            logging.warning(f"⚠️ Trace-Datei '{path}' ist ab Datensatz {records + 1:,} beschädigt. Rest wird ignoriert. Fehler: {e}")
+
+
+class ReplayExecutor:
+    """
+    Ersetzt in monitor_and_restart Messung, Freigabe und Wartezeiten durch eine Simulation auf einer
+    aufgezeichneten Trace: simulierte Uhr, keine echten Prozesse. Die Wirkung einer Maßnahme wird als
+    Abweichung von der Aufzeichnung modelliert: gezielt beendete Prozesse fehlen in jeder weiteren Messung
+    mit ihrem jeweils aktuellen Anteil, ein Neustart setzt den Verbrauch auf baseline_mb zurück
+    (Versatz offset_mb), danach folgt er den Änderungen der Trace.
+    """
+    MAX_GAP_SECONDS = 300  # Größere Lücken in der Trace gelten als Pause des Monitors
+
+    def __init__(self, config, label, baseline_mb=None):
+        self.config = config
+        self.label = label
+        self.trend = MemoryTrend(config)
+        self.leaks = LeakDetector(config) if config.get('LEAK_DETECTION_ENABLED', False) else None
+        self.baseline_mb = baseline_mb
+        self.min_seen_mb = float('inf')
+        self.offset_mb = 0.0
+        self.floor_mb = 0.0
+        self.killed = set()  # (PID, Startzeit) gezielt beendeter Prozesse
+        self.record = None
+        self.clock = None
+        self.next_check = None
+        self.checks = 0
+        self.events = []  # (Zeitpunkt, 'targeted' | 'restart', simulierter Verbrauch in MB)
+        self.over_limit_seconds = 0.0
+        self.peak_mb = 0.0
+
+    def surviving_mb(self, record):
+        """Gesamtverbrauch des Datensatzes ohne den Anteil der gezielt beendeten Prozesse (nach ihrem RSS)."""
+        if not self.killed:
+            return record.total_mb
+        processes = record.processes()
+        rss_total = sum(p[3] for p in processes)
+        killed_rss = sum(p[3] for p in processes if (p[0], p[1]) in self.killed)
+        return record.total_mb * (1 - killed_rss / rss_total) if rss_total else record.total_mb
+
+    def simulated_mb(self, trace_mb):
+        """Verbrauch, der ohne die Aufzeichnung, aber mit den simulierten Maßnahmen zu erwarten wäre."""
+        if self.offset_mb > 0 and trace_mb - self.offset_mb < self.floor_mb:
+            # In der Aufzeichnung wurde selbst Speicher frei; der simulierte Verbrauch fällt nicht unter die Basis.
+            self.offset_mb = max(0.0, trace_mb - self.floor_mb)
+        return trace_mb - self.offset_mb
+
+    def advance(self, record):
+        """Verarbeitet den nächsten Datensatz der Trace und führt alle bis dahin fälligen Prüfungen aus."""
+        previous, self.record = self.record, record
+        self.min_seen_mb = min(self.min_seen_mb, record.total_mb)
+        if previous is None:
+            self.next_check = record.timestamp
+            return
+        gap = record.timestamp - previous.timestamp
+        if gap > self.MAX_GAP_SECONDS:
+            self.next_check = max(self.next_check, record.timestamp)
+        else:
+            current_mb = self.simulated_mb(self.surviving_mb(previous))
+            self.peak_mb = max(self.peak_mb, current_mb)
+            if current_mb > self.config['RAM_LIMIT_MB']:
+                self.over_limit_seconds += gap
+        # Fällige Prüfungen sehen den letzten Datensatz vor ihrem Zeitpunkt.
+        self.record = previous
+        while self.next_check < record.timestamp:
+            self.clock = self.next_check
+            interval = monitor_and_restart(None, self.config, False, self.trend, executor=self)
+            self.next_check = self.clock + interval
+        self.record = record
+
+    def collect(self, config):
+        processes = self.record.processes()
+        if self.killed:
+            # Auch in der Aufzeichnung beendete Prozesse müssen nicht mehr herausgerechnet werden.
+            self.killed.intersection_update((pid, create_time) for pid, create_time, _, _ in processes)
+        entries = [ReplayedProcess(*p) for p in processes if (p[0], p[1]) not in self.killed]
+        surviving_mb = self.surviving_mb(self.record)
+        total_mb = self.simulated_mb(surviving_mb)
+        if self.offset_mb > 0 and surviving_mb > 0:
+            # Nach einem simulierten Neustart sind alle verbliebenen Prozesse anteilig kleiner.
+            scale = total_mb / surviving_mb
+            for entry in entries:
+                entry.rss *= scale
+        if self.leaks:
+            self.leaks.update(entries, self.clock)
+        self.checks += 1
+        return MonitorSample(self.clock, entries, total_mb)
+
+    def reclaim(self, brave_path, entries, current_ram, config, have_pywin32):
+        if config.get('TARGETED_RECLAIM_ENABLED', True):
+            victims, freed_bytes = select_reclaim_victims(entries, current_ram, config)
+            if victims:
+                freed_mb = freed_bytes / (1024 * 1024)
+                self.killed.update(entry.key for entry in victims)
+                current_ram -= freed_mb
+                if self.offset_mb > 0:
+                    # Der Versatz nach einem Neustart zählt in Einheiten der Trace, die Opfer wurden aber verkleinert
+                    # gemessen; ihn so nachführen, dass der simulierte Verbrauch um genau freed_mb sinkt.
+                    self.offset_mb = max(0.0, self.surviving_mb(self.record) - current_ram)
+                self.events.append((self.clock, 'targeted', current_ram))
+                self.sleep(config.get('TARGETED_RECLAIM_WAIT_SECONDS', 2))
+                if current_ram <= config['RAM_LIMIT_MB']:
+                    return False
+        baseline = self.baseline_mb if self.baseline_mb is not None else self.min_seen_mb
+        self.floor_mb = baseline
+        self.offset_mb = max(0.0, self.record.total_mb - baseline)
+        self.killed.clear()
+        self.events.append((self.clock, 'restart', current_ram))
+        if config.get('LAUNCH_SCHEDULER_ENABLED', True):
+            # Die Bereitschaft der Profile ist in der Trace nicht sichtbar; mindestens die Ruhephase abwarten.
+            self.sleep(config.get('LAUNCH_READY_STABLE_SECONDS', 3))
+        return True
+
+    def sleep(self, seconds):
+        self.clock += seconds
+
+
+REPLAY_POLICIES = {
+    'config': {},  # Einstellungen aus config.json unverändert
+    'restart': {'TARGETED_RECLAIM_ENABLED': False, 'PREDICTIVE_RESTART_ENABLED': False},
+    'targeted': {'TARGETED_RECLAIM_ENABLED': True, 'PREDICTIVE_RESTART_ENABLED': False},
+    'predictive': {'TARGETED_RECLAIM_ENABLED': True, 'PREDICTIVE_RESTART_ENABLED': True},
+}
+
+def run_replay(args):
+    """Spielt eine Trace-Datei mit verschiedenen Limits, Intervallen und Strategien ab (Unterbefehl 'replay')."""
+    config = load_or_create_config(create=False)
+    limits = [int(value) for value in args.limit.split(',')] if args.limit else [config['RAM_LIMIT_MB']]
+    intervals = [float(value) for value in args.interval.split(',')] if args.interval else [config.get('CHECK_INTERVAL_SECONDS', 60)]
+    policies = args.policy.split(',')
+    unknown = [policy for policy in policies if policy not in REPLAY_POLICIES]
+    if unknown:
+        print(f"❌ Unbekannte Strategie: {', '.join(unknown)} (möglich: {', '.join(REPLAY_POLICIES)})")
+        return 2
+
+    variants = [ReplayExecutor({**config, **REPLAY_POLICIES[policy], 'RAM_LIMIT_MB': limit, 'CHECK_INTERVAL_SECONDS': interval},
+                               f"{limit:,} MB / {interval:g}s / {policy}", args.baseline_mb)
+                for limit in limits for interval in intervals for policy in policies]
+
+    # Alle Varianten laufen gemeinsam in einem Durchgang über die Trace; die Auswertung selbst bleibt stumm.
+    previous_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.ERROR)
+    start = time.perf_counter()
+    records = 0
+    first = last = None
+    try:
+        for record in read_trace(args.trace):
+            records += 1
+            first = first if first is not None else record.timestamp
+            last = record.timestamp
+            for variant in variants:
+                variant.advance(record)
+    except OSError as e:
+        print(f"❌ Trace-Datei kann nicht gelesen werden: {e}")
+        return 1
+    finally:
+        logging.getLogger().setLevel(previous_level)
+    if not records:
+        print("Keine Datensätze in der Trace-Datei.")
+        return 0
+
+    print(f"🎞️ {records:,} Messungen über {(last - first) / 3600:,.1f} h in {time.perf_counter() - start:.2f}s simuliert.")
+    print(f"{'Variante':<36} {'Prüfungen':>10} {'Gezielt':>8} {'Neustarts':>10} {'Über Limit':>11} {'Spitze':>10}")
+    results = []
+    for variant in variants:
+        targeted = sum(1 for _, kind, _ in variant.events if kind == 'targeted')
+        restarts = sum(1 for _, kind, _ in variant.events if kind == 'restart')
+        print(f"{variant.label:<36} {variant.checks:>10,} {targeted:>8,} {restarts:>10,} {variant.over_limit_seconds:>10,.0f}s {variant.peak_mb:>7,.0f} MB")
+        if args.events:
+            for timestamp, kind, current_mb in variant.events:
+                action = "Neustart" if kind == 'restart' else "gezielt beendet"
+                print(f"    {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))}  {action} ({current_mb:,.0f} MB)")
+        results.append({'variant': variant.label, 'ram_limit_mb': variant.config['RAM_LIMIT_MB'],
+                        'check_interval_seconds': variant.config['CHECK_INTERVAL_SECONDS'], 'checks': variant.checks,
+                        'targeted': targeted, 'restarts': restarts, 'over_limit_seconds': variant.over_limit_seconds,
+                        'peak_mb': variant.peak_mb, 'events': variant.events})
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+def create_exporters(config):
+    """
+    Erstellt die aktivierten Exporter. Jeder Exporter ist ein Callable, das pro Messung aufgerufen wird.
+    Gibt (Exporter, Aufräumfunktionen) zurück; letztere werden beim Beenden mit close_exporters aufgerufen.
+    """
+    exporters, closers = [], []
+    if config.get('HISTORY_ENABLED', False):
+        try:
+            ring = HistoryRing(config.get('HISTORY_PATH', 'brave_ram_history.bin'), config.get('HISTORY_CAPACITY', 604800))
+            exporters.append(ring.append)
+            closers.append(ring.close)
+        except (OSError, ValueError) as e:
+            logging.error(f"❌ Verlaufsdatei kann nicht geöffnet werden. Verlauf deaktiviert. Fehler: {e}")
+    if config.get('TRACE_ENABLED', False):
+        try:
+            recorder = TraceRecorder(TraceRecorder.run_path(config.get('TRACE_PATH', 'brave_ram_trace.tsv.gz')))
+            logging.info(f"🎞️ Zeichne Messungen in '{recorder.path}' auf.")
+            exporters.append(recorder.append)
+            closers.append(recorder.close)
+        except OSError as e:
+            logging.error(f"❌ Trace-Datei kann nicht geöffnet werden. Aufzeichnung deaktiviert. Fehler: {e}")
+    if config.get('METRICS_ENABLED', False) and start_metrics_server(config):
+        ram_limit, target = config['RAM_LIMIT_MB'], build_targets(config)[0].name
+        exporters.append(lambda sample: _METRICS.update(sample, ram_limit, target))
+    return exporters, closers
+
+def close_exporters(closers):
+    """Schließt Verlaufs- und Trace-Datei beim Beenden (auch nach SIGINT/SIGTERM)."""
+    for close in closers:
+        try:
+            close()
+        except Exception as e:
+            logging.error(f"❌ Fehler beim Schließen eines Exporters: {e}")
+
 
 def check_admin_rights():
     """Prüft, ob Admin-Rechte vorhanden sind (nur Windows)."""
@@ -413,8 +3053,46 @@ def check_admin_rights():
             return False
     return True # Auf Nicht-Windows-Systemen wird angenommen, dass root-Rechte nicht nötig sind
 
+def parse_arguments(argv=None):
+    """Liest die Kommandozeile. Ohne Unterbefehl startet die Überwachung."""
+    parser = argparse.ArgumentParser(description="Überwacht den RAM-Verbrauch von Brave und startet den Browser bei Bedarf neu.")
+    subparsers = parser.add_subparsers(dest='command')
+    history_parser = subparsers.add_parser('history', help="Verlauf der Messwerte auswerten (min/max/Perzentile).")
+    history_parser.add_argument('--since', default='24h', help="Zeitfenster, z.B. 90s, 15m, 6h, 7d (Standard: 24h)")
+    history_parser.add_argument('--field', default='total', choices=HistoryRing.FIELDS, help="Auszuwertendes Feld (Standard: total)")
+    history_parser.add_argument('--path', default=None, help="Verlaufsdatei (Standard: HISTORY_PATH aus config.json)")
+    bench_parser = subparsers.add_parser('bench', help="Skalierung mit synthetischen Prozessen messen (ohne echten Browser).")
+    bench_parser.add_argument('--hosts', default='100,1000,10000,50000', help="Kommagetrennte Anzahl Fremdprozesse (Standard: 100,1000,10000,50000)")
+    bench_parser.add_argument('--brave', type=int, default=40, help="Anzahl Brave-Prozesse (Standard: 40)")
+    bench_parser.add_argument('--ticks', type=int, default=50, help="Gemessene Ticks pro Stufe (Standard: 50)")
+    bench_parser.add_argument('--churn', type=float, default=0.01, help="Anteil der Fremdprozesse, die pro Tick ersetzt werden (Standard: 0.01)")
+    bench_parser.add_argument('--seed', type=int, default=0, help="Startwert des Zufallsgenerators")
+    bench_parser.add_argument('--json', default=None, help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    bench_parser.add_argument('--max-tick-ms', type=float, default=None, help="Mit Exit-Code 1 beenden, wenn die Tick-Latenz (p95) darüber liegt")
+    replay_parser = subparsers.add_parser('replay', help="Aufgezeichnete Trace mit anderen Limits/Intervallen/Strategien abspielen.")
+    replay_parser.add_argument('trace', help="Trace-Datei (TRACE_PATH)")
+    replay_parser.add_argument('--limit', default=None, help="Kommagetrennte RAM-Limits in MB (Standard: RAM_LIMIT_MB)")
+    replay_parser.add_argument('--interval', default=None, help="Kommagetrennte Prüfintervalle in Sekunden (Standard: CHECK_INTERVAL_SECONDS)")
+    replay_parser.add_argument('--policy', default='config', help=f"Kommagetrennte Strategien: {', '.join(REPLAY_POLICIES)} (Standard: config)")
+    replay_parser.add_argument('--baseline-mb', type=float, default=None, help="Verbrauch direkt nach einem Neustart (Standard: kleinster bisher aufgezeichneter Wert)")
+    replay_parser.add_argument('--events', action='store_true', help="Jede simulierte Maßnahme mit Zeitpunkt ausgeben")
+    replay_parser.add_argument('--json', default=None, help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    return parser.parse_args(argv)
+
 def main():
     """Die Haupt-Überwachungsschleife."""
+    args = parse_arguments()
+    if args.command == 'history':
+        if args.path is None:
+            args.path = load_or_create_config(create=False).get('HISTORY_PATH', 'brave_ram_history.bin')
+        sys.exit(query_history(args))
+    if args.command == 'bench':
+        logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+        sys.exit(run_benchmark(args))
+    if args.command == 'replay':
+        logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+        sys.exit(run_replay(args))
+
     # Signal-Handler für sauberes Beenden registrieren
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -445,11 +3123,45 @@ def main():
     brave_path = find_brave_executable_path()
     show_startup_info(brave_path, config)
 
+    exporters, closers = create_exporters(config)
+    try:
+        run_monitor(brave_path, config, have_pywin32, exporters)
+    finally:
+        close_exporters(closers)
+
+def run_monitor(brave_path, config, have_pywin32, exporters):
+    """Startet die Überwachung im passenden Modus und läuft bis zum Beenden (Signal)."""
+    instances = None
+    if config.get('MULTI_INSTANCE_ENABLED', False) or config.get('TARGETS'):
+        # Mehrere Ziele bzw. Instanzen warten nicht blockierend nach Neustarts und nutzen daher die klassische Schleife.
+        if config.get('MULTI_INSTANCE_ENABLED', False):
+            logging.info(f"⚙️ Modus: systemweit, ein Limit pro {'Benutzer' if config.get('INSTANCE_SCOPE') == 'user' else 'Instanz'} (klassische Schleife).")
+        else:
+            logging.info(f"⚙️ Modus: {len(config['TARGETS'])} Ziele, ein Limit pro Ziel (klassische Schleife).")
+        if config.get('DAEMON_MODE', 'async') == 'async':
+            logging.info("ℹ️ DAEMON_MODE 'async' wird mit TARGETS bzw. MULTI_INSTANCE_ENABLED nicht unterstützt. Die Wartezeit nach einem Neustart hält die übrigen Ziele aber nicht auf.")
+        instances = MultiInstanceMonitor(config)
+    elif config.get('DAEMON_MODE', 'async') == 'async':
+        logging.info("⚙️ Modus: asynchroner Daemon (Messung läuft auch während eines Neustarts weiter).")
+        asyncio.run(run_async_daemon(brave_path, config, have_pywin32, exporters))
+        return
+
+    trend = MemoryTrend(config)
+    waiter = create_event_waiter(config)
+    pressure = False
+
     # Haupt-Überwachungsschleife
     while True:
         try:
-            monitor_and_restart(brave_path, config, have_pywin32)
-            time.sleep(config.get('CHECK_INTERVAL_SECONDS', 60))
+            if instances is not None:
+                next_check = instances.check(brave_path, have_pywin32, pressure, exporters)
+            else:
+                next_check = monitor_and_restart(brave_path, config, have_pywin32, trend, pressure, exporters)
+            logging.debug(f"Nächste Prüfung in {next_check:.1f}s.")
+            events = waiter.wait(next_check)
+            for _, reason in events:
+                logging.info(f"⚡ Ereignis: {reason}. Prüfe sofort.")
+            pressure = any(kind == 'psi' for kind, _ in events)
         except Exception as e:
             logging.critical(f"❌ Unerwarteter Fehler in der Hauptschleife: {e}", exc_info=True)
             # Kurze Pause bei unerwarteten Fehlern
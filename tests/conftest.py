@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import brave_ram_monitor  # noqa: E402
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Standardkonfiguration, ohne eine config.json im Arbeitsverzeichnis anzulegen."""
+    monkeypatch.chdir(tmp_path)
+    return {**brave_ram_monitor.load_or_create_config(), 'MEMORY_SAMPLER': 'psutil', 'MEMORY_ACCOUNTING': 'rss'}
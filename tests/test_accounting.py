@@ -0,0 +1,48 @@
+import os
+
+import psutil
+import pytest
+
+from brave_ram_monitor import MemoryAccountant, TrackedProcess
+
+MB = 1024 * 1024
+
+
+class Unreadable:
+    """Prozess, dessen PSS/USS nicht gelesen werden darf (z.B. fremder Benutzer)."""
+    pid = 2 ** 22 + 12345  # oberhalb von pid_max, existiert also sicher nicht
+
+    def memory_full_info(self):
+        raise psutil.AccessDenied(self.pid)
+
+
+def entry(rss_mb, proc=None):
+    item = TrackedProcess.__new__(TrackedProcess)
+    item.proc = proc or Unreadable()
+    item.pid = item.proc.pid
+    item.rss = rss_mb * MB
+    return item
+
+
+@pytest.mark.parametrize('mode', ['pss', 'uss'])
+def test_unreadable_processes_fall_back_to_rss(config, mode):
+    accountant = MemoryAccountant({**config, 'MEMORY_ACCOUNTING': mode, 'PSS_EVERY_N_TICKS': 5})
+    entries = [entry(300), entry(200)]
+    assert accountant.total_bytes(entries) == 500 * MB
+    # Auch die hochgerechneten Ticks dazwischen dürfen nicht auf 0 fallen.
+    for _ in range(3):
+        assert accountant.total_bytes(entries) == 500 * MB
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/smaps_rollup'), reason="nur mit smaps_rollup (Linux)")
+def test_uss_of_own_process_is_at_most_rss(config):
+    own = psutil.Process()
+    accountant = MemoryAccountant({**config, 'MEMORY_ACCOUNTING': 'uss'})
+    item = entry(0, own)
+    item.rss = own.memory_info().rss
+    assert 0 < accountant.total_bytes([item]) <= item.rss
+
+
+def test_resolve_mode_rejects_unknown_values(config):
+    assert MemoryAccountant.resolve_mode({**config, 'MEMORY_ACCOUNTING': 'vss'}) == 'rss'
+    assert MemoryAccountant.resolve_mode({**config, 'MEMORY_ACCOUNTING': 'USS'}) == 'uss'
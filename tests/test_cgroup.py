@@ -0,0 +1,31 @@
+import os
+import subprocess
+
+import pytest
+
+from brave_ram_monitor import BraveCgroup
+
+pytestmark = pytest.mark.skipif(not os.path.exists('/bin/sh'), reason="nur POSIX")
+
+
+@pytest.fixture
+def cgroup(tmp_path):
+    path = tmp_path / 'brave-ram-monitor.scope'
+    path.mkdir()
+    (path / 'cgroup.procs').write_text('')
+    return BraveCgroup(str(tmp_path), str(path))
+
+
+def test_wrapper_joins_cgroup_then_execs_command(cgroup):
+    result = subprocess.run(cgroup.wrap_command(['/bin/echo', 'Brave', '--profile-directory=Profile 1']),
+                            capture_output=True, text=True, check=True)
+    assert result.stdout == 'Brave --profile-directory=Profile 1\n'
+    with open(os.path.join(cgroup.path, 'cgroup.procs')) as f:
+        assert f.read().strip() == '0'
+
+
+def test_wrapper_still_starts_command_without_write_access(cgroup):
+    os.remove(os.path.join(cgroup.path, 'cgroup.procs'))
+    os.rmdir(cgroup.path)
+    result = subprocess.run(cgroup.wrap_command(['/bin/echo', 'ok']), capture_output=True, text=True)
+    assert result.returncode == 0 and result.stdout == 'ok\n'
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import brave_ram_monitor
+from brave_ram_monitor import MonitorSample, run_async_daemon
+
+INTERVAL = 0.3
+
+
+class BlockingRestart:
+    """Erste Freigabe blockiert, bis der Test sie freigibt; danach liegt der Verbrauch unter dem Limit."""
+
+    def __init__(self, monkeypatch, limit):
+        self.limit = limit
+        self.samples = []  # (Zeitpunkt, Freigabe läuft gerade)
+        self.reclaims = []  # Zeitpunkte der Freigaben
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.released_at = None
+        self.total_mb = limit + 1000
+        monkeypatch.setattr(brave_ram_monitor, 'collect_sample', self.collect)
+        monkeypatch.setattr(brave_ram_monitor, 'reclaim_and_restart', self.reclaim)
+
+    def collect(self, config):
+        self.samples.append((time.monotonic(), self.started.is_set() and not self.release.is_set()))
+        entries = [SimpleNamespace(pid=100, proc_type='renderer', rss=self.total_mb * 1024 * 1024)]
+        return MonitorSample(time.time(), entries, self.total_mb, monotonic=time.monotonic())
+
+    def reclaim(self, brave_path, entries, current_ram, config, have_pywin32):
+        self.reclaims.append(time.monotonic())
+        if len(self.reclaims) == 1:
+            self.started.set()
+            self.release.wait(10)
+        else:
+            self.total_mb = self.limit - 1000
+        return False
+
+
+async def wait_until(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_sampling_continues_during_blocking_reclaim(config, monkeypatch):
+    cfg = {**config, 'RAM_LIMIT_MB': 4000, 'CHECK_INTERVAL_SECONDS': INTERVAL, 'ADAPTIVE_INTERVAL_ENABLED': False,
+           'MIN_CHECK_INTERVAL_SECONDS': INTERVAL, 'PREDICTIVE_RESTART_ENABLED': False, 'CGROUP_ENABLED': False,
+           'PSI_TRIGGER_ENABLED': False}
+    sim = BlockingRestart(monkeypatch, cfg['RAM_LIMIT_MB'])
+
+    async def scenario():
+        daemon = asyncio.create_task(run_async_daemon(None, cfg, False))
+        try:
+            await wait_until(sim.started.is_set)
+            # Die Messung läuft weiter, obwohl die Freigabe blockiert und das Limit weiter überschritten ist.
+            await wait_until(lambda: sum(blocked for _, blocked in sim.samples) >= 3)
+            assert len(sim.reclaims) == 1
+            sim.released_at = time.monotonic()
+            sim.release.set()
+            await wait_until(lambda: len(sim.reclaims) == 2)
+        finally:
+            daemon.cancel()
+            await asyncio.gather(daemon, return_exceptions=True)
+
+    asyncio.run(scenario())
+    # Direkt nach dem Ende der Freigabe wird neu gemessen, nicht erst nach dem regulären Intervall.
+    after = [at for at, _ in sim.samples if at >= sim.released_at]
+    assert after[0] - sim.released_at < INTERVAL / 2
+    assert sim.reclaims[1] - sim.released_at < INTERVAL / 2
@@ -0,0 +1,63 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from brave_ram_monitor import HistoryRing, MonitorSample, load_or_create_config
+
+MB = 1024 * 1024
+
+
+def sample(timestamp, total_mb, renderer_mb=100):
+    entries = [
+        SimpleNamespace(proc_type='browser', rss=300 * MB),
+        SimpleNamespace(proc_type='renderer', rss=renderer_mb * MB),
+    ]
+    return MonitorSample(timestamp, entries, total_mb)
+
+
+@pytest.fixture
+def ring(tmp_path):
+    ring = HistoryRing(str(tmp_path / 'history.bin'), capacity=4)
+    yield ring
+    ring.close()
+
+
+def test_round_trip_and_wraparound(ring):
+    for second in range(6):
+        ring.append(sample(1000 + second, 2000 + second))
+    assert len(ring) == 4
+    assert list(ring.values('total')) == [2002, 2003, 2004, 2005]
+    assert list(ring.values('total', since=1003, until=1004)) == [2003, 2004]
+    assert list(ring.values('processes')) == [2] * 4
+
+
+def test_values_above_64_gb_are_not_clamped(ring):
+    ring.append(sample(1000, 200_000, renderer_mb=90_000))
+    assert list(ring.values('total')) == [200_000]
+    assert list(ring.values('renderer')) == [90_000]
+
+
+def test_clock_step_backwards_keeps_ring_sorted(ring):
+    for timestamp, total in ((1000, 1), (1001, 2), (900, 3), (1002, 4)):
+        ring.append(sample(timestamp, total))
+    assert [ring.timestamp_at(i) for i in range(len(ring))] == [1000, 1001, 1001, 1002]
+    assert list(ring.values('total', since=1001, until=1001)) == [2, 3]
+
+
+def test_reopen_read_only(tmp_path):
+    path = str(tmp_path / 'history.bin')
+    ring = HistoryRing(path, capacity=8)
+    ring.append(sample(1000, 1234))
+    ring.close()
+    reader = HistoryRing(path)
+    try:
+        assert list(reader.values('total')) == [1234]
+    finally:
+        reader.close()
+
+
+def test_read_only_config_does_not_create_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert load_or_create_config(create=False)['HISTORY_PATH']
+    assert not os.path.exists('config.json')
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+import brave_ram_monitor
+from brave_ram_monitor import BraveProcessTracker, MultiInstanceMonitor, SyntheticProcessSource
+
+
+class Host:
+    """Synthetische Prozesstabelle mit Brave-Instanzen mehrerer Benutzer; Neustarts werden nur aufgezeichnet."""
+
+    def __init__(self, monkeypatch, config):
+        self.source = SyntheticProcessSource(20, 1, churn=0)
+        for proc in self.source.brave_processes():
+            self.source.remove(proc.pid)
+        self.launched = []  # (Benutzer, Kommandozeile)
+        monkeypatch.setattr(brave_ram_monitor, '_PROCESS_TRACKER', BraveProcessTracker(config, self.source))
+        monkeypatch.setattr(brave_ram_monitor, '_launch_process', self.launch)
+
+    def instance(self, user, renderers_mb, user_data_dir=None):
+        """Startet eine Instanz (Hauptprozess mit 200 MB und Renderern) und gibt alle ihre PIDs zurück."""
+        source = self.source
+        extra = [f'--user-data-dir={user_data_dir}'] if user_data_dir else []
+        main = source._add(source.brave_name, [source.brave_exe, *extra], 200, user=user)
+        return {main, *(source._add(source.brave_name, [source.brave_exe, '--type=renderer'], mb, ppid=main, user=user)
+                        for mb in renderers_mb)}
+
+    def launch(self, cmdline, cgroup=None, launch_as=None):
+        user = launch_as.user if launch_as else 'bench'
+        self.launched.append((user, cmdline))
+        return self.source._add(self.source.brave_name, cmdline, 200, user=user)
+
+    def pids(self):
+        return {proc.pid for proc in self.source.brave_processes()}
+
+
+@pytest.fixture
+def multi_config(config):
+    return {**config, 'MULTI_INSTANCE_ENABLED': True, 'RAM_LIMIT_MB': 10000, 'TARGETED_RECLAIM_ENABLED': False,
+            'PREDICTIVE_RESTART_ENABLED': False, 'SHUTDOWN_STRATEGY': 'kill', 'LAUNCH_SCHEDULER_ENABLED': False,
+            'RESTART_WAIT_SECONDS': 30}
+
+
+def labels_and_limits(monitor):
+    return {key[1:]: instance.config['RAM_LIMIT_MB'] for key, instance in monitor.instances.items()}
+
+
+def test_groups_by_user_and_user_data_dir(multi_config, monkeypatch):
+    host = Host(monkeypatch, multi_config)
+    host.instance('alice', [100])
+    host.instance('alice', [100], '/srv/kiosk')
+    host.instance('bob', [100, 100])
+    monitor = MultiInstanceMonitor(multi_config)
+    monitor.check(None, False)
+    assert set(labels_and_limits(monitor)) == {('alice', None), ('alice', '/srv/kiosk'), ('bob', None)}
+    assert len(monitor.instances[(monitor.tracker.targets[0], 'bob', None)].entries) == 3
+
+
+def test_user_scope_merges_instances_of_a_user(multi_config, monkeypatch):
+    cfg = {**multi_config, 'INSTANCE_SCOPE': 'user'}
+    host = Host(monkeypatch, cfg)
+    host.instance('alice', [100])
+    host.instance('alice', [100], '/srv/kiosk')
+    host.instance('bob', [100])
+    monitor = MultiInstanceMonitor(cfg)
+    monitor.check(None, False)
+    assert set(labels_and_limits(monitor)) == {('alice', None), ('bob', None)}
+
+
+def test_instance_limit_lookup_order(multi_config, monkeypatch):
+    cfg = {**multi_config, 'INSTANCE_RAM_LIMITS_MB': {'/srv/kiosk': 1000, 'alice': 2000, 'bob': 3000}}
+    host = Host(monkeypatch, cfg)
+    host.instance('alice', [100])
+    host.instance('alice', [100], '/srv/kiosk')
+    host.instance('CORP\\bob', [100])
+    host.instance('carol', [100])
+    monitor = MultiInstanceMonitor(cfg)
+    monitor.check(None, False)
+    # Erst user-data-dir, dann voller Benutzername, dann Benutzername ohne Domäne, sonst RAM_LIMIT_MB.
+    assert labels_and_limits(monitor) == {('alice', '/srv/kiosk'): 1000, ('alice', None): 2000,
+                                          ('CORP\\bob', None): 3000, ('carol', None): 10000}
+
+
+def test_restart_is_scoped_to_the_instance_over_its_limit(multi_config, monkeypatch):
+    cfg = {**multi_config, 'INSTANCE_RAM_LIMITS_MB': {'alice': 1000, '/srv/kiosk': 5000, 'bob': 5000}}
+    host = Host(monkeypatch, cfg)
+    alice = host.instance('alice', [800, 800])
+    kiosk = host.instance('alice', [800, 800], '/srv/kiosk')
+    bob = host.instance('bob', [800, 800])
+    monitor = MultiInstanceMonitor(cfg)
+    monitor.check(None, False)
+    # Nur die Standardinstanz von alice wird beendet und als alice ohne eigenes Datenverzeichnis neu gestartet.
+    assert not alice & host.pids()
+    assert kiosk | bob <= host.pids()
+    assert [(user, [arg for arg in cmdline if arg.startswith('--user-data-dir')]) for user, cmdline in host.launched] == [('alice', [])]
+
+
+def test_cooldown_does_not_block_other_instances(multi_config, monkeypatch):
+    cfg = {**multi_config, 'INSTANCE_RAM_LIMITS_MB': {'alice': 1000, 'bob': 1500}}
+    host = Host(monkeypatch, cfg)
+    host.instance('alice', [800, 800])
+    bob = host.instance('bob', [800])
+    monitor = MultiInstanceMonitor(cfg)
+    start = time.monotonic()
+    monitor.check(None, False)
+    alice = monitor.instances[(monitor.tracker.targets[0], 'alice', None)]
+    # Die Wartezeit nach dem Neustart blockiert nicht, sondern gilt nur für alice.
+    assert alice.is_busy()
+    assert alice.cooldown_until >= start + multi_config['RESTART_WAIT_SECONDS']
+    assert len(host.launched) == 1
+
+    # Die neu gestartete Instanz von alice liegt sofort über ihrem Limit, bob inzwischen ebenfalls.
+    host.source._add(host.source.brave_name, [host.source.brave_exe, '--type=renderer'], 2000, ppid=min(bob), user='bob')
+    for proc in host.source.brave_processes():
+        if proc.username() == 'alice':
+            proc.rss = 2000 * 1024 * 1024
+    next_check = monitor.check(None, False)
+    assert time.monotonic() - start < multi_config['RESTART_WAIT_SECONDS']
+    assert not bob & host.pids()
+    assert [user for user, _ in host.launched] == ['alice', 'bob']
+    assert next_check < multi_config['RESTART_WAIT_SECONDS']
@@ -0,0 +1,126 @@
+import pytest
+
+import brave_ram_monitor
+from brave_ram_monitor import BraveProcessTracker, LaunchScheduler, SyntheticProcessSource
+
+
+class SharedUserDataDir:
+    """
+    Simuliert Brave mit gemeinsamem user-data-dir: Der erste Start wird zum Hauptprozess, jeder weitere
+    übergibt nach 0,5 s an ihn und endet; die Renderer des neuen Fensters entstehen unter dem Hauptprozess.
+    """
+
+    def __init__(self, monkeypatch, renderer_delays=(2.0, 4.0)):
+        self.source = SyntheticProcessSource(20, 1, churn=0)
+        for proc in self.source.brave_processes():
+            self.source.remove(proc.pid)
+        self.renderer_delays = renderer_delays
+        self.clock = 0.0
+        self.events = []  # (Zeitpunkt, Aktion)
+        self.launched = []  # (Profil, Zeitpunkt)
+        self.main = None
+        monkeypatch.setattr(brave_ram_monitor.time, 'monotonic', lambda: self.clock)
+        monkeypatch.setattr(brave_ram_monitor.time, 'sleep', self.sleep)
+        monkeypatch.setattr(brave_ram_monitor, '_launch_process', self.launch)
+
+    def add(self, cmdline, rss_mb, ppid=1):
+        return self.source._add(self.source.brave_name, [self.source.brave_exe, *cmdline], rss_mb, ppid=ppid)
+
+    def at(self, delay, action):
+        self.events.append((self.clock + delay, action))
+
+    def sleep(self, seconds):
+        self.clock += seconds
+        due = [event for event in self.events if event[0] <= self.clock]
+        self.events = [event for event in self.events if event[0] > self.clock]
+        for _, action in sorted(due, key=lambda event: event[0]):
+            action()
+
+    def spawn_renderer(self):
+        self.add(['--type=renderer'], 150, ppid=self.main)
+
+    def launch(self, cmdline, cgroup=None, launch_as=None):
+        self.launched.append((cmdline[-1].partition('=')[2], self.clock))
+        pid = self.add(cmdline[1:], 250)
+        if self.main is None:
+            self.main = pid
+            self.at(0.5, lambda: self.add(['--type=gpu-process'], 100, ppid=pid))
+        else:
+            self.at(0.5, lambda: self.source.remove(pid))
+        for delay in self.renderer_delays:
+            self.at(delay, self.spawn_renderer)
+        return pid
+
+
+@pytest.fixture
+def scheduler_config(config):
+    return {**config, 'LAUNCH_CONCURRENCY': 1, 'LAUNCH_READY_STABLE_SECONDS': 3,
+            'LAUNCH_READY_TIMEOUT_SECONDS': 60, 'LAUNCH_POLL_SECONDS': 0.5}
+
+
+def default_instance(tracker):
+    return (tracker.targets[0], None, None)
+
+
+def launches(*profiles):
+    return [(profile, ['/opt/brave.com/brave/brave', f'--profile-directory={profile}']) for profile in profiles]
+
+
+def test_handoff_launch_waits_for_its_renderers(config, scheduler_config, monkeypatch):
+    sim = SharedUserDataDir(monkeypatch)
+    tracker = BraveProcessTracker(config, sim.source)
+    scheduler = LaunchScheduler(scheduler_config, tracker, default_instance(tracker))
+    results = scheduler.run(launches('Default', 'Profile 1'))
+    assert [(label, ready) for label, _, ready in results] == [('Default', True), ('Profile 1', True)]
+    # Der zweite Start endet nach 0,5 s, bereit ist er erst nach seinem letzten Renderer plus Ruhephase.
+    assert results[1][1] >= 4.0 + 3
+    # Gestaffelt: das zweite Profil startet erst, nachdem das erste bereit war.
+    assert sim.launched[1][1] >= results[0][1]
+
+
+def test_concurrent_launches_settle_together(config, scheduler_config, monkeypatch):
+    sim = SharedUserDataDir(monkeypatch)
+    tracker = BraveProcessTracker(config, sim.source)
+    scheduler = LaunchScheduler({**scheduler_config, 'LAUNCH_CONCURRENCY': 2}, tracker, default_instance(tracker))
+    results = scheduler.run(launches('Default', 'Profile 1', 'Profile 2'))
+    assert all(ready for _, _, ready in results)
+    assert [label for label, _ in sim.launched] == ['Default', 'Profile 1', 'Profile 2']
+    assert sim.launched[2][1] > sim.launched[1][1]
+    assert len(sim.source.brave_processes()) == 2 + 3 * 2  # Hauptprozess, GPU und je zwei Renderer
+
+
+def test_times_out_while_instance_keeps_changing(config, scheduler_config, monkeypatch):
+    sim = SharedUserDataDir(monkeypatch, renderer_delays=[1.0 + i for i in range(100)])
+    tracker = BraveProcessTracker(config, sim.source)
+    scheduler = LaunchScheduler({**scheduler_config, 'LAUNCH_READY_TIMEOUT_SECONDS': 20}, tracker, default_instance(tracker))
+    results = scheduler.run(launches('Default'))
+    assert results == [('Default', pytest.approx(20.0), False)]
+
+
+def test_polls_do_not_advance_the_rescan_window(config, scheduler_config, monkeypatch):
+    sim = SharedUserDataDir(monkeypatch)
+    tracker = BraveProcessTracker(config, sim.source)
+    tracker.refresh()
+    checks = []
+    monkeypatch.setattr(tracker, '_verify_ignored', lambda: checks.append(sim.clock))
+    LaunchScheduler(scheduler_config, tracker, default_instance(tracker)).run(launches('Default'))
+    assert checks == []
+
+
+def test_handoff_fallback_ignores_other_instances(config, scheduler_config, monkeypatch):
+    sim = SharedUserDataDir(monkeypatch)
+    # Der Hauptprozess läuft bereits (nicht von hier gestartet); jeder Start übergibt an ihn und endet.
+    sim.main = sim.add([], 250)
+    kiosk = sim.add(['--user-data-dir=/srv/kiosk'], 250)
+
+    def churn():
+        # Eine andere Instanz auf dem Rechner ändert sich ständig.
+        pid = sim.add(['--type=renderer'], 150, ppid=kiosk)
+        sim.at(0.5, lambda: sim.source.remove(pid))
+        sim.at(1.0, churn)
+
+    churn()
+    tracker = BraveProcessTracker(config, sim.source)
+    results = LaunchScheduler(scheduler_config, tracker, default_instance(tracker)).run(launches('Default'))
+    assert [(label, ready) for label, _, ready in results] == [('Default', True)]
+    assert results[0][1] >= 4.0 + 3
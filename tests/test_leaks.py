@@ -0,0 +1,52 @@
+import statistics
+from types import SimpleNamespace
+
+import pytest
+
+from brave_ram_monitor import LeakDetector
+
+MB = 1024 * 1024
+
+
+def process(pid, rss_mb):
+    return SimpleNamespace(pid=pid, key=(pid, 1.0), proc_type='renderer', rss=rss_mb * MB, growth=0.0, cmdline=[])
+
+
+@pytest.fixture
+def detector(config):
+    return LeakDetector({**config, 'LEAK_WINDOW_SECONDS': 600, 'LEAK_MIN_AGE_SECONDS': 60,
+                         'LEAK_REPORT_INTERVAL_SECONDS': 10 ** 9})
+
+
+def test_slope_of_linear_growth_in_mb_per_minute(detector):
+    for second in range(0, 600, 10):
+        leaking, steady = process(1, 100 + second * 0.05), process(2, 300)
+        detector.update([leaking, steady], float(second))
+    assert leaking.growth == pytest.approx(3.0)
+    assert steady.growth == pytest.approx(0.0, abs=1e-9)
+    assert detector.top([leaking, steady]) == [leaking]
+
+
+def test_recent_growth_outweighs_old_plateau(detector):
+    times, values = [], []
+    for second in range(0, 3600, 10):
+        rss_mb = 200 if second < 3000 else 200 + (second - 3000) * 0.1
+        entry = process(1, rss_mb)
+        detector.update([entry], float(second))
+        times.append(second)
+        values.append(rss_mb)
+    # Eine ungewichtete Regression über die ganze Stunde verwässert die jüngste Steigung (6 MB/min) stärker.
+    assert entry.growth > 2 * statistics.linear_regression(times, values).slope * 60
+
+
+def test_no_growth_before_min_age(detector):
+    for second in range(0, 60, 10):
+        entry = process(1, 100 + second)
+        detector.update([entry], float(second))
+    assert entry.growth == 0.0
+
+
+def test_exited_processes_are_dropped(detector):
+    detector.update([process(1, 100), process(2, 100)], 0.0)
+    detector.update([process(2, 100)], 10.0)
+    assert len(detector) == 1
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from brave_ram_monitor import MetricsRegistry, MonitorSample
+
+MB = 1024 * 1024
+
+
+def process(proc_type, rss_mb):
+    return SimpleNamespace(proc_type=proc_type, rss=rss_mb * MB)
+
+
+def render(registry, sample, ram_limit=4096, target='brave'):
+    registry.update(sample, ram_limit, target)
+    return registry.snapshot.decode('utf-8').splitlines()
+
+
+def test_single_instance_in_bytes():
+    sample = MonitorSample(1700000000.0, [process('browser', 300), process('renderer', 200), process('renderer', 100)], 550.0)
+    lines = render(MetricsRegistry(), sample)
+    assert 'brave_memory_bytes{target="brave",instance="brave"} %d' % (550 * MB) in lines
+    assert 'brave_memory_limit_bytes{target="brave",instance="brave"} %d' % (4096 * MB) in lines
+    assert 'brave_memory_by_type_bytes{target="brave",instance="brave",type="renderer"} %d' % (300 * MB) in lines
+    assert 'brave_processes{target="brave",instance="brave",type="renderer"} 2' in lines
+    assert '# TYPE brave_memory_bytes gauge' in lines
+    assert not any('megabytes' in line for line in lines)
+
+
+def test_instances_have_their_own_series_and_limits():
+    alice, bob = [process('renderer', 100)], [process('renderer', 700)]
+    sample = MonitorSample(0.0, alice + bob, 800.0, instances=[
+        ('brave', 'alice', 100.0, 2048, alice),
+        ('edge', 'bob "admin"\\ops\nteam', 700.0, 1024, bob),
+    ])
+    lines = render(MetricsRegistry(), sample)
+    assert 'brave_memory_bytes{target="brave",instance="alice"} %d' % (100 * MB) in lines
+    assert 'brave_memory_limit_bytes{target="brave",instance="alice"} %d' % (2048 * MB) in lines
+    # Anführungszeichen, Backslash und Zeilenumbruch werden im Label maskiert.
+    escaped = 'instance="bob \\"admin\\"\\\\ops\\nteam"'
+    assert 'brave_memory_limit_bytes{target="edge",%s} %d' % (escaped, 1024 * MB) in lines
+    assert 'brave_processes{target="edge",%s,type="renderer"} 1' % escaped in lines
+
+
+def test_stage_counters_and_relaunches():
+    registry = MetricsRegistry()
+    registry.record_stage('targeted_kill', 0.25)
+    registry.record_stage('targeted_kill', 0.5)
+    registry.record_stage('kill', 1.0)
+    registry.record_relaunch(12.5, [('Default', 5.0, True), ('Work', 7.5, False)])
+    lines = render(registry, MonitorSample(0.0, [process('browser', 100)], 100.0))
+    assert 'brave_restart_stage_total{stage="targeted_kill"} 2' in lines
+    assert 'brave_restart_stage_total{stage="wm_close"} 0' in lines
+    assert 'brave_restart_stage_seconds_total{stage="targeted_kill"} 0.750' in lines
+    assert 'brave_relaunch_total 1' in lines
+    assert 'brave_relaunch_recovery_seconds 12.500' in lines
+    assert 'brave_profile_launch_total{result="ready"} 1' in lines
+    assert 'brave_profile_launch_total{result="timeout"} 1' in lines
@@ -0,0 +1,54 @@
+import logging
+
+import pytest
+
+import brave_ram_monitor
+from brave_ram_monitor import MonitorSample, create_event_waiter, evaluate_sample, open_psi_trigger
+
+
+@pytest.fixture(autouse=True)
+def fresh_cooldown(monkeypatch):
+    monkeypatch.setattr(brave_ram_monitor, '_LAST_PRESSURE_ACTION', {})
+
+
+def sample(total_mb):
+    return MonitorSample(0.0, [object()], total_mb)
+
+
+def test_pressure_below_limit_acts_once_per_cooldown(config, monkeypatch):
+    cfg = {**config, 'RAM_LIMIT_MB': 8000, 'PSI_RECLAIM_MIN_MB': 1000, 'PSI_COOLDOWN_SECONDS': 300}
+    clock = [1000.0]
+    monkeypatch.setattr(brave_ram_monitor.time, 'monotonic', lambda: clock[0])
+    assert evaluate_sample(sample(3000), cfg, pressure=True)[0]
+    clock[0] += 60
+    assert not evaluate_sample(sample(3000), cfg, pressure=True)[0]
+    clock[0] += 300
+    assert evaluate_sample(sample(3000), cfg, pressure=True)[0]
+
+
+def test_cooldown_is_tracked_per_instance(config):
+    cfg = {**config, 'RAM_LIMIT_MB': 8000, 'PSI_RECLAIM_MIN_MB': 1000}
+    assert evaluate_sample(sample(3000), cfg, pressure=True, label='alice')[0]
+    assert evaluate_sample(sample(3000), cfg, pressure=True, label='bob')[0]
+    assert not evaluate_sample(sample(3000), cfg, pressure=True, label='alice')[0]
+
+
+def test_cooldown_never_blocks_a_real_limit_breach(config):
+    cfg = {**config, 'RAM_LIMIT_MB': 2000, 'PSI_RECLAIM_MIN_MB': 1000}
+    assert evaluate_sample(sample(1500), cfg, pressure=True)[0]
+    assert evaluate_sample(sample(2500), cfg, pressure=True)[0]
+
+
+def test_small_brave_footprint_ignores_pressure(config):
+    assert not evaluate_sample(sample(500), {**config, 'PSI_RECLAIM_MIN_MB': 1000}, pressure=True)[0]
+
+
+def test_psi_trigger_is_rejected_cleanly_outside_linux(config, monkeypatch, caplog):
+    monkeypatch.setattr(brave_ram_monitor.sys, 'platform', 'win32')
+    monkeypatch.delattr(brave_ram_monitor.os, 'O_NONBLOCK')
+    with pytest.raises(OSError):
+        open_psi_trigger(config)
+    with caplog.at_level(logging.WARNING):
+        waiter = create_event_waiter({**config, 'PSI_TRIGGER_ENABLED': True})
+    assert not waiter._handlers
+    assert 'PSI' in caplog.text
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from brave_ram_monitor import select_reclaim_victims
+
+MB = 1024 * 1024
+
+
+def process(pid, proc_type, rss_mb, growth=0.0):
+    return SimpleNamespace(pid=pid, proc_type=proc_type, rss=rss_mb * MB, growth=growth)
+
+
+ENTRIES = [
+    process(1, 'browser', 800),
+    process(2, 'gpu-process', 600),
+    process(3, 'renderer', 900),
+    process(4, 'renderer', 700),
+    process(5, 'renderer', 500),
+    process(6, 'utility', 100),
+]
+RSS_TOTAL_MB = sum(entry.rss for entry in ENTRIES) / MB
+
+
+def test_picks_largest_allowed_types_until_excess_is_covered(config):
+    victims, freed = select_reclaim_victims(ENTRIES, RSS_TOTAL_MB, {**config, 'RAM_LIMIT_MB': RSS_TOTAL_MB - 1000})
+    assert [entry.pid for entry in victims] == [3, 4]
+    assert freed == 1600 * MB
+
+
+def test_respects_max_processes(config):
+    victims, _ = select_reclaim_victims(ENTRIES, RSS_TOTAL_MB, {**config, 'RAM_LIMIT_MB': 100, 'TARGETED_RECLAIM_MAX_PROCESSES': 2})
+    assert len(victims) == 2
+
+
+def test_compares_in_accounted_units(config):
+    # PSS ist halb so groß wie RSS: Um 800 MB PSS freizugeben, reichen 900 MB RSS nicht aus.
+    pss_total = RSS_TOTAL_MB / 2
+    victims, freed = select_reclaim_victims(ENTRIES, pss_total, {**config, 'RAM_LIMIT_MB': pss_total - 800})
+    assert [entry.pid for entry in victims] == [3, 4]
+    assert freed == 800 * MB
+
+
+def test_leak_priority_ranks_growing_processes_first(config):
+    entries = ENTRIES[:-1] + [process(6, 'utility', 100, growth=12.0)]
+    cfg = {**config, 'RAM_LIMIT_MB': RSS_TOTAL_MB - 50, 'LEAK_RECLAIM_PRIORITY': True, 'LEAK_REPORT_MB_PER_MINUTE': 2}
+    victims, _ = select_reclaim_victims(entries, RSS_TOTAL_MB, cfg)
+    assert [entry.pid for entry in victims] == [6]
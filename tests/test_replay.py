@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from brave_ram_monitor import REPLAY_POLICIES, MonitorSample, ReplayExecutor, TraceRecorder, read_trace
+
+MB = 1024 * 1024
+
+
+def leaking_trace(path, seconds, leak_mb_per_second=1.0):
+    """Hauptprozess 300 MB, ein Renderer wächst ab 600 MB um 1 MB/s, ein zweiter bleibt bei 100 MB."""
+    recorder = TraceRecorder(path)
+    for second in range(seconds):
+        leaking_mb = 600 + second * leak_mb_per_second
+        entries = [SimpleNamespace(pid=1, create_time=1.0, proc_type='browser', rss=300 * MB),
+                   SimpleNamespace(pid=2, create_time=1.0, proc_type='renderer', rss=leaking_mb * MB),
+                   SimpleNamespace(pid=3, create_time=1.0, proc_type='renderer', rss=100 * MB)]
+        recorder.append(MonitorSample(1700000000.0 + second, entries, 1000 + second * leak_mb_per_second))
+    recorder.close()
+
+
+def replay(config, path, policy, limit):
+    executor = ReplayExecutor({**config, **REPLAY_POLICIES[policy], 'RAM_LIMIT_MB': limit, 'CHECK_INTERVAL_SECONDS': 10,
+                               'ADAPTIVE_INTERVAL_ENABLED': False}, policy)
+    for record in read_trace(path):
+        executor.advance(record)
+    return executor
+
+
+def test_killed_renderer_stays_gone_while_it_grows_in_the_trace(config, tmp_path):
+    path = str(tmp_path / 'trace.tsv')
+    leaking_trace(path, 2000)
+    executor = replay(config, path, 'targeted', 1200)
+    # Genau ein gezieltes Beenden; der Renderer wächst in der Aufzeichnung weiter, in der Simulation nicht.
+    assert [kind for _, kind, _ in executor.events] == ['targeted']
+    _, _, after_kill = executor.events[0]
+    assert after_kill == pytest.approx(400, abs=1)
+    assert executor.simulated_mb(executor.surviving_mb(executor.record)) == pytest.approx(400, abs=1)
+    # Ohne Neustart bleiben die übrigen Prozesse unverändert groß.
+    sample = executor.collect(executor.config)
+    assert sorted(entry.rss / MB for entry in sample.entries) == pytest.approx([100, 300])
+
+
+def test_restart_scales_surviving_processes(config, tmp_path):
+    path = str(tmp_path / 'trace.tsv')
+    leaking_trace(path, 300)
+    executor = replay({**config, 'TARGETED_RECLAIM_MAX_PROCESSES': 0}, path, 'targeted', 1200)
+    assert [kind for _, kind, _ in executor.events] == ['restart']
+    sample = executor.collect(executor.config)
+    # Nach dem Neustart folgt der Verbrauch der Trace ab der Basis (kleinster gesehener Wert); die Prozesse schrumpfen anteilig.
+    assert sample.total_mb < executor.record.total_mb
+    assert sum(entry.rss for entry in sample.entries) / MB == pytest.approx(sample.total_mb)
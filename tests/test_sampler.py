@@ -0,0 +1,96 @@
+import errno
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import psutil
+import pytest
+
+from brave_ram_monitor import ProcMemorySampler
+
+pytestmark = pytest.mark.skipif(not ProcMemorySampler.is_supported(), reason="nur Linux mit /proc")
+
+# Setzt comm auf einen Namen mit Leerzeichen und Klammern und wartet dann auf stdin.
+CHILD = "import sys; open('/proc/self/comm', 'w').write(sys.argv[1]); print(flush=True); sys.stdin.read()"
+
+
+@pytest.fixture
+def spawn():
+    children = []
+
+    def start(comm='sleeper'):
+        child = subprocess.Popen([sys.executable, '-c', CHILD, comm], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        child.stdout.readline()
+        children.append(child)
+        return child
+
+    yield start
+    for child in children:
+        child.kill()
+        child.wait()
+
+
+def entry_for(pid):
+    return SimpleNamespace(pid=pid, proc=psutil.Process(pid), rss=0, ppid=0)
+
+
+def test_parses_comm_with_spaces_and_parentheses(spawn):
+    child = spawn('a) b (c) d')
+    assert psutil.Process(child.pid).name() == 'a) b (c) d'
+    sampler = ProcMemorySampler()
+    entry = entry_for(child.pid)
+    assert sampler.sample(entry)
+    assert entry.ppid == os.getpid()
+    assert entry.rss == pytest.approx(psutil.Process(child.pid).memory_info().rss, rel=0.2)
+
+
+def test_zombie_counts_as_exited(spawn):
+    child = spawn()
+    sampler = ProcMemorySampler()
+    entry = entry_for(child.pid)
+    assert sampler.sample(entry)
+    child.kill()  # nicht abholen: der Prozess bleibt ein Zombie
+    deadline = time.monotonic() + 5
+    while psutil.Process(child.pid).status() != psutil.STATUS_ZOMBIE and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not sampler.sample(entry)
+    assert child.pid not in sampler._fds
+
+
+def test_cached_descriptor_stays_bound_to_exited_process(spawn):
+    child = spawn()
+    sampler = ProcMemorySampler()
+    entry = entry_for(child.pid)
+    assert sampler.sample(entry)
+    fds = sampler._fds[child.pid]
+    child.kill()
+    child.wait()
+    # Eine wiederverwendete PID würde über den alten Deskriptor nie gelesen: er liefert ESRCH.
+    with pytest.raises(ProcessLookupError):
+        os.preadv(fds[0], [bytearray(64)], 0)
+    assert not sampler.sample(entry)
+
+
+def test_descriptor_cache_is_capped(spawn):
+    children = [spawn() for _ in range(6)]
+    sampler = ProcMemorySampler()
+    sampler.max_cached = 2
+    entries = [entry_for(child.pid) for child in children]
+    assert all(sampler.sample(entry) for entry in entries)
+    assert all(entry.rss > 0 for entry in entries)
+    assert len(sampler._fds) == 2
+
+
+def test_descriptor_exhaustion_does_not_drop_processes(spawn, monkeypatch):
+    child = spawn()
+    sampler = ProcMemorySampler()
+    entry = entry_for(child.pid)
+
+    def exhausted(*args, **kwargs):
+        raise OSError(errno.EMFILE, os.strerror(errno.EMFILE))
+
+    monkeypatch.setattr(os, 'open', exhausted)
+    assert sampler.sample(entry)
+    assert entry.rss > 0
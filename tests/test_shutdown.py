@@ -0,0 +1,88 @@
+import errno
+import logging
+import os
+import select
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+import brave_ram_monitor
+from brave_ram_monitor import restart_allowed, wait_for_processes_exit
+
+
+@pytest.fixture
+def children():
+    popens = [subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']) for _ in range(4)]
+    yield popens
+    for popen in popens:
+        popen.kill()
+        popen.wait()
+
+
+def test_returns_as_soon_as_all_processes_exited(children):
+    procs = [psutil.Process(popen.pid) for popen in children]
+    for popen in children:
+        popen.terminate()
+        popen.wait()
+    gone, alive = wait_for_processes_exit(procs, 5, callback=lambda proc: None)
+    assert alive == [] and len(gone) == 4
+
+
+def test_timeout_reports_survivors(children):
+    procs = [psutil.Process(popen.pid) for popen in children]
+    gone, alive = wait_for_processes_exit(procs, 0.2, callback=lambda proc: None)
+    assert gone == [] and len(alive) == 4
+
+
+@pytest.mark.skipif(not hasattr(os, 'pidfd_open'), reason="pidfd nur unter Linux")
+def test_pidfd_failure_midway_reports_each_process_once(children, monkeypatch):
+    procs = [psutil.Process(popen.pid) for popen in children]
+    # Zwei Prozesse enden sofort, die übrigen erst, nachdem poll() beim zweiten Aufruf scheitert.
+    children[0].terminate()
+    children[1].terminate()
+    real_poll = select.poll
+
+    class FailingPoll:
+        def __init__(self):
+            self.poller = real_poll()
+            self.calls = 0
+
+        def register(self, *args):
+            self.poller.register(*args)
+
+        def unregister(self, fd):
+            self.poller.unregister(fd)
+
+        def poll(self, timeout):
+            self.calls += 1
+            if self.calls == 1:
+                time.sleep(0.2)
+                return self.poller.poll(timeout)
+            for popen in children[2:]:
+                popen.terminate()
+            raise OSError(errno.EINTR, "poll failed")
+
+    monkeypatch.setattr(brave_ram_monitor.select, 'poll', FailingPoll)
+    reported = []
+    gone, alive = wait_for_processes_exit(procs, 5, callback=reported.append)
+    assert alive == []
+    assert sorted(proc.pid for proc in reported) == sorted(proc.pid for proc in procs)
+    assert sorted(proc.pid for proc in gone) == sorted(proc.pid for proc in procs)
+
+
+def test_strategy_none_warns_at_most_once_per_interval(config, monkeypatch, caplog):
+    monkeypatch.setattr(brave_ram_monitor, '_LAST_NO_SHUTDOWN_WARNING', {})
+    clock = [1000.0]
+    monkeypatch.setattr(brave_ram_monitor.time, 'monotonic', lambda: clock[0])
+    cfg = {**config, 'SHUTDOWN_STRATEGY': 'none'}
+    with caplog.at_level(logging.WARNING):
+        for _ in range(5):
+            assert not restart_allowed(cfg)
+            clock[0] += 60
+        assert len(caplog.records) == 1
+        clock[0] += brave_ram_monitor.NO_SHUTDOWN_WARNING_INTERVAL_SECONDS
+        restart_allowed(cfg)
+        assert len(caplog.records) == 2
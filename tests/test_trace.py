@@ -0,0 +1,66 @@
+import gzip
+from types import SimpleNamespace
+
+from brave_ram_monitor import MonitorSample, TraceRecorder, read_trace
+
+MB = 1024 * 1024
+
+
+def sample(timestamp, total_mb):
+    entries = [SimpleNamespace(pid=10, create_time=1.5, proc_type='renderer', rss=200 * MB)]
+    return MonitorSample(timestamp, entries, total_mb)
+
+
+def record(path, timestamps):
+    recorder = TraceRecorder(path)
+    for index, timestamp in enumerate(timestamps):
+        recorder.append(sample(timestamp, 1000 + index))
+    recorder.close()
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'trace.tsv.gz')
+    record(path, [100.0, 101.0, 102.0])
+    records = list(read_trace(path))
+    assert [r.timestamp for r in records] == [100.0, 101.0, 102.0]
+    assert [r.total_mb for r in records] == [1000, 1001, 1002]
+    assert records[0].processes() == [[10, 1.5, 'renderer', 200 * MB]]
+
+
+def test_each_run_gets_its_own_file(tmp_path):
+    template = str(tmp_path / 'trace.tsv.gz')
+    assert TraceRecorder.run_path(template, 0) != template
+    assert TraceRecorder.run_path(template, 0).endswith('.tsv.gz')
+    assert TraceRecorder.run_path(template, 0) != TraceRecorder.run_path(template, 3600)
+
+
+def test_truncated_trace_keeps_complete_records(tmp_path):
+    path = str(tmp_path / 'trace.tsv.gz')
+    record(path, [float(t) for t in range(2000)])
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:len(data) // 2])
+    records = list(read_trace(path))
+    assert 0 < len(records) < 2000
+
+
+def test_corrupt_trace_is_not_fatal(tmp_path):
+    path = str(tmp_path / 'trace.tsv.gz')
+    record(path, [float(t) for t in range(2000)])
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    middle = len(data) // 2
+    data[middle:middle + 64] = bytes(64)
+    with open(path, 'wb') as f:
+        f.write(data)
+    assert len(list(read_trace(path))) < 2000
+
+
+def test_not_gzip_is_not_fatal(tmp_path):
+    path = tmp_path / 'trace.tsv.gz'
+    path.write_bytes(b'not a gzip file\n')
+    assert list(read_trace(str(path))) == []
+    with gzip.open(path, 'wb'):
+        pass
+    assert list(read_trace(str(path))) == []
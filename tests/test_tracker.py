@@ -0,0 +1,120 @@
+import pytest
+
+from brave_ram_monitor import BraveProcessTracker, SyntheticProcess, SyntheticProcessSource
+
+
+class CountingSource(SyntheticProcessSource):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lookups = 0
+
+    def process(self, pid):
+        self.lookups += 1
+        return super().process(pid)
+
+
+def brave_pids(entries, source):
+    return {entry.pid for entry in entries if entry.name == source.brave_name}
+
+
+def test_tracks_brave_processes_only(config):
+    source = SyntheticProcessSource(500, 20, churn=0)
+    tracker = BraveProcessTracker(config, source)
+    expected = {proc.pid for proc in source.brave_processes()}
+    assert brave_pids(tracker.refresh(), source) == expected
+
+
+def test_steady_state_tick_does_not_reclassify_host_processes(config):
+    source = CountingSource(2000, 10, churn=0)
+    tracker = BraveProcessTracker({**config, 'PROCESS_RESCAN_TICKS': 60}, source)
+    tracker.refresh()
+    for _ in range(120):
+        source.lookups = 0
+        tracker.refresh()
+        # Pro Tick nur die Startzeit eines kleinen Teils der verworfenen PIDs, nie die ganze Prozessliste.
+        assert source.lookups <= 2000 // 60 + 1
+
+
+@pytest.mark.parametrize('host_count, churn, warmup', [(100, 0, 1), (5000, 0.01, 200)])
+def test_reused_pid_is_detected_within_rescan_window(config, host_count, churn, warmup):
+    source = SyntheticProcessSource(host_count, 5, churn=churn)
+    tracker = BraveProcessTracker({**config, 'PROCESS_RESCAN_TICKS': 60}, source)
+    # Mit Fluktuation erst einen eingeschwungenen Zustand herstellen (beendete PIDs dürfen das Budget nicht belegen).
+    for _ in range(warmup):
+        source.tick()
+        tracker.refresh()
+    # Der zuletzt geprüfte Fremdprozess endet, und ein Renderer erhält zwischen zwei Ticks dieselbe PID.
+    pid = next(reversed(tracker._ignored))
+    source.tick()
+    source.remove(pid)
+    if pid in source._host_pids:
+        source._host_pids.remove(pid)
+    source._processes[pid] = SyntheticProcess(source, pid, source.brave_name, [source.brave_exe, '--type=renderer'], 100 * 1024 * 1024)
+    found_after = None
+    for tick in range(1, 70):
+        if pid in {entry.pid for entry in tracker.refresh()}:
+            found_after = tick
+            break
+        source.tick()
+    assert found_after is not None and found_after <= 60
+
+
+def test_exited_processes_are_dropped(config):
+    source = SyntheticProcessSource(100, 8, churn=0)
+    tracker = BraveProcessTracker(config, source)
+    tracker.refresh()
+    renderer = next(proc for proc in source.brave_processes() if '--type=renderer' in proc._cmdline)
+    source.remove(renderer.pid)
+    assert renderer.pid not in {entry.pid for entry in tracker.refresh()}
+
+
+def test_successor_of_exited_brave_process_is_tracked_immediately(config):
+    source = SyntheticProcessSource(50, 8, churn=0)
+    tracker = BraveProcessTracker(config, source)
+    tracker.refresh()
+    renderer = next(proc for proc in source.brave_processes() if '--type=renderer' in proc._cmdline)
+    # Der Renderer endet, und ein neuer Renderer erhält dieselbe PID, bevor der Tracker es bemerkt.
+    source.remove(renderer.pid)
+    source.clock += 1
+    source._processes[renderer.pid] = SyntheticProcess(source, renderer.pid, source.brave_name,
+                                                       [source.brave_exe, '--type=renderer'], 50 * 1024 * 1024)
+    tracker.refresh()  # Der Sampler erkennt den Wechsel und verwirft den alten Eintrag.
+    entries = {entry.pid: entry for entry in tracker.refresh()}
+    assert entries[renderer.pid].create_time == source.clock
+
+
+def test_profiles_are_reported_per_user_data_dir(config):
+    source = SyntheticProcessSource(50, 10, churn=0, profiles=2)
+    main = source._add(source.brave_name, [source.brave_exe, '--user-data-dir=/srv/kiosk', '--profile-directory=Kiosk'], 200)
+    source._add(source.brave_name, [source.brave_exe, '--type=renderer'], 100, ppid=main)
+    tracker = BraveProcessTracker(config, source)
+    tracker.refresh()
+    instances = {user_data_dir: sorted(profiles) for user_data_dir, profiles in tracker.get_profiles()}
+    assert instances == {None: ['Default', 'Profile 1'], '/srv/kiosk': ['Kiosk']}
+
+
+def test_profiles_default_without_main_process(config):
+    source = SyntheticProcessSource(20, 1, churn=0)
+    for proc in list(source.brave_processes()):
+        source.remove(proc.pid)
+    tracker = BraveProcessTracker(config, source)
+    tracker.refresh()
+    assert tracker.get_profiles() == [(None, [])]
+
+
+def test_crashpad_handlers_are_not_browser_processes(config):
+    source = SyntheticProcessSource(10, 5, churn=0)
+    source._add('chrome_crashpad_handler', ['/opt/brave.com/brave/chrome_crashpad_handler', '--database=/tmp'], 5)
+    tracker = BraveProcessTracker(config, source)
+    names = {entry.name for entry in tracker.refresh()}
+    assert names == {source.brave_name}
+
+
+def test_longest_process_name_wins_at_same_position(config):
+    source = SyntheticProcessSource(10, 0, churn=0)
+    edge = source._add('msedge', ['/opt/microsoft/msedge/msedge', '--type=renderer'], 100)
+    webview = source._add('msedgewebview2', ['/opt/microsoft/msedge/msedgewebview2', '--type=renderer'], 100)
+    # Die kürzere Regel steht absichtlich zuerst.
+    tracker = BraveProcessTracker({**config, 'TARGETS': [{'NAME': 'edge', 'PROCESS_NAME': 'msedge'},
+                                                         {'NAME': 'webview', 'PROCESS_NAME': 'msedgewebview2'}]}, source)
+    assert {entry.pid: entry.target.name for entry in tracker.refresh()} == {edge: 'edge', webview: 'webview'}
@@ -0,0 +1,51 @@
+import math
+
+import pytest
+
+from brave_ram_monitor import MemoryTrend
+
+
+def feed(trend, values, step=10.0, start=0.0):
+    for index, value in enumerate(values):
+        trend.update(value, start + index * step)
+
+
+def test_slope_follows_linear_growth(config):
+    trend = MemoryTrend({**config, 'TREND_SMOOTHING': 0.5})
+    feed(trend, [1000 + 60 * i for i in range(30)])  # 6 MB/s
+    assert trend.slope == pytest.approx(6.0)
+    assert trend.seconds_until(4000) == pytest.approx((4000 - trend.last_mb) / 6.0)
+
+
+def test_no_prediction_without_growth(config):
+    trend = MemoryTrend(config)
+    feed(trend, [2000, 1990, 1980])
+    assert math.isinf(trend.seconds_until(4000))
+
+
+def test_interval_shrinks_before_predicted_breach(config):
+    trend = MemoryTrend({**config, 'TREND_SMOOTHING': 1.0, 'MIN_CHECK_INTERVAL_SECONDS': 1})
+    feed(trend, [1000, 1600])  # 60 MB/s, Limit in 40 s
+    assert trend.next_interval(4000) == pytest.approx(10.0)
+
+
+def test_flat_usage_stretches_interval_far_from_limit(config):
+    trend = MemoryTrend(config)
+    feed(trend, [1000] * 20)
+    for _ in range(10):
+        interval = trend.next_interval(4000)
+    assert interval == trend.max_interval
+
+
+def test_flat_usage_near_limit_keeps_interval_short(config):
+    trend = MemoryTrend({**config, 'MIN_CHECK_INTERVAL_SECONDS': 1, 'MAX_CHECK_INTERVAL_SECONDS': 120})
+    feed(trend, [3960] * 20)  # 99 % des Limits, aber stabil
+    for _ in range(10):
+        interval = trend.next_interval(4000)
+    assert interval <= 3
+
+
+def test_fixed_interval_when_not_adaptive(config):
+    trend = MemoryTrend({**config, 'ADAPTIVE_INTERVAL_ENABLED': False})
+    feed(trend, [1000, 3900])
+    assert trend.next_interval(4000) == config['CHECK_INTERVAL_SECONDS']